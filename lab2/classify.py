@@ -0,0 +1,125 @@
+IN_VT, UPPER = 1, 2  # Symbol flags, a symbol with neither is not allowed in a regular grammar
+
+REGULAR = "Regular Grammar (Type 3)"
+CONTEXT_FREE = "Context-Free Grammar (Type 2)"
+CONTEXT_SENSITIVE = "Context-Sensitive Grammar (Type 1)"
+RECURSIVELY_ENUMERABLE = "Recursively Enumerable Grammar (Type 0)"
+
+
+def classify_productions(grammar):
+    """Classify in one pass, returning the level and the first production that broke each level"""
+    vt, production = set(grammar["vt"]), grammar["production"]
+
+    # Every distinct symbol is classified once, productions then only do dict lookups
+    symbols = {}
+
+    def flags(symbol):
+        found = symbols.get(symbol)
+        if found is None:
+            found = symbols[symbol] = (IN_VT if symbol in vt else 0) | (UPPER if symbol.isupper() else 0)
+        return found
+
+    failures = {}
+    regular = context_free = context_sensitive = True
+
+    for lhs, rhs_list in production.items():
+        if context_free and not (len(lhs) == 1 and flags(lhs) & UPPER):
+            context_free = False
+            failures[CONTEXT_FREE] = (lhs, None)
+            if regular:
+                regular = False
+                failures[REGULAR] = (lhs, None)
+
+        for rhs in rhs_list:
+            if regular:
+                # A -> a, A -> B or A -> xB, with only two symbols to look at
+                if len(rhs) == 1:
+                    ok = flags(rhs) != 0
+                elif len(rhs) == 2:
+                    ok = flags(rhs[0]) != 0 and flags(rhs[1]) & UPPER
+                else:
+                    ok = False
+                if not ok:
+                    regular = False
+                    failures[REGULAR] = (lhs, rhs)
+
+            if context_sensitive and len(rhs) < len(lhs):
+                context_sensitive = False
+                failures[CONTEXT_SENSITIVE] = (lhs, rhs)
+
+        # Regular failing implies nothing, but once context-free and context-sensitive
+        # have both failed the answer can no longer change
+        if not context_free and not context_sensitive:
+            break
+
+    level = (REGULAR if regular else
+             CONTEXT_FREE if context_free else
+             CONTEXT_SENSITIVE if context_sensitive else
+             RECURSIVELY_ENUMERABLE)
+    return level, failures
+
+
+def _classify_grammar_reference(grammar):
+    # The previous nested-list implementation, kept as the benchmark baseline
+    vt, production = set(grammar["vt"]), grammar["production"]
+
+    results = [
+        (
+            len(lhs) == 1 and lhs.isupper(),
+            list(map(lambda rhs: (
+                all(symbol in vt or symbol.isupper() for symbol in rhs) and
+                (len(rhs) == 1 or (len(rhs) == 2 and rhs[1].isupper())),
+                len(rhs) >= len(lhs)
+            ), rhs_list))
+        )
+        for lhs, rhs_list in production.items()
+    ]
+
+    is_regular = all(lhs_ok and all(rhs_ok for rhs_ok, _ in rhs_checks) for lhs_ok, rhs_checks in results)
+
+    is_context_free = all(lhs_ok for lhs_ok, _ in results)
+
+    is_context_sensitive = all(all(sensitive_ok for _, sensitive_ok in rhs_checks) for _, rhs_checks in results)
+
+    return (REGULAR if is_regular else
+            CONTEXT_FREE if is_context_free else
+            CONTEXT_SENSITIVE if is_context_sensitive else
+            RECURSIVELY_ENUMERABLE)
+
+
+if __name__ == "__main__":
+    import random
+    import string
+    import time
+
+    def generated_grammar(rhs_per_symbol, seed):
+        # Machine-generated right-linear grammar, 26 non-terminals with many alternatives each
+        rng = random.Random(seed)
+        production = {
+            lhs: [rng.choice(string.ascii_lowercase) + rng.choice(string.ascii_uppercase) for _ in range(rhs_per_symbol)]
+            for lhs in string.ascii_uppercase
+        }
+        return {"vt": list(string.ascii_lowercase), "production": production, "start_symbol": "A"}
+
+    regular = generated_grammar(4000, 1)
+    context_sensitive = generated_grammar(4000, 2)
+    context_sensitive["production"]["AB"] = ["abC"]  # Only the very last production breaks Type 2
+    unrestricted = generated_grammar(4000, 3)
+    unrestricted["production"] = {"AB": ["a"], **unrestricted["production"]}  # Decided immediately
+
+    cases = {"regular": regular, "context-sensitive": context_sensitive, "unrestricted": unrestricted}
+    for name, grammar in cases.items():
+        start = time.perf_counter()
+        expected = _classify_grammar_reference(grammar)
+        reference = time.perf_counter() - start
+
+        start = time.perf_counter()
+        level, failures = classify_productions(grammar)
+        single_pass = time.perf_counter() - start
+
+        assert level == expected
+        productions = sum(map(len, grammar["production"].values()))
+        print(f"{name} ({productions} productions): {level}")
+        print(f"  reference {reference * 1000:.1f} ms, single pass {single_pass * 1000:.2f} ms")
+        for broken, where in failures.items():
+            print(f"  not {broken}: {where}")
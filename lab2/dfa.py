@@ -0,0 +1,337 @@
+import codecs
+import mmap
+import struct
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the vectorized batch mode
+    np = None
+
+DEAD = 0  # Every compiled automaton reserves state 0 as the dead (trap) state
+
+# Binary layout (little-endian): header, length-prefixed UTF-8 symbols then state names,
+# padding to 4 bytes, int32 transition table, accepting-state bitmap
+MAGIC = b"LFAD"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIII")  # magic, version, reserved, states, symbols, start
+LENGTH = struct.Struct("<I")
+
+
+class CompiledDFA:
+    """Dense, integer-indexed transition table built from a JSON automaton"""
+
+    __slots__ = ("state_names", "symbols", "symbol_index", "width", "table", "start", "accepting")
+
+    def __init__(self, state_names, symbols, table, start, accepting):
+        # Instances are read-only after construction, so one DFA can be shared across threads
+        init = object.__setattr__
+        init(self, "state_names", tuple(state_names))  # state_names[0] is the dead state
+        init(self, "symbols", tuple(symbols))
+        init(self, "symbol_index", {symbol: i for i, symbol in enumerate(self.symbols)})
+        init(self, "width", len(self.symbols))
+        # Flat row-major table: table[state * width + column]
+        init(self, "table", memoryview(table).toreadonly())
+        init(self, "start", start)
+        init(self, "accepting", bytes(accepting))  # One 0/1 flag per state
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        # memoryviews can't be pickled, so ship a copy of the table (e.g. to pool workers)
+        accepting = list(self.accepting)
+        return (type(self), (self.state_names, self.symbols, array("i", self.table), self.start, accepting))
+
+    def __str__(self):
+        return self.format_transitions()
+
+    def format_transitions(self):
+        """Readable transition listing, only built when somebody asks for it"""
+        lines = ["State Transitions:"]
+        for state in range(1, len(self.state_names)):
+            row = state * self.width
+            transitions = [
+                f"{symbol} -> {self.state_names[self.table[row + column]]}"
+                for column, symbol in enumerate(self.symbols)
+                if self.table[row + column] != DEAD
+            ]
+            if transitions:
+                lines.append(f"  {self.state_names[state]}: {', '.join(transitions)}")
+        return "\n".join(lines)
+
+    def step(self, state, symbol):
+        column = self.symbol_index.get(symbol)
+        if column is None:
+            return DEAD
+        return self.table[state * self.width + column]
+
+    def match(self, input_string):
+        table, width, index = self.table, self.width, self.symbol_index
+        state = self.start
+
+        for symbol in input_string:
+            column = index.get(symbol)
+            if column is None:
+                return False
+            state = table[state * width + column]
+            if state == DEAD:  # Nothing is accepted once we fall into the trap
+                return False
+
+        return bool(self.accepting[state])
+
+    def match_many(self, strings):
+        """Match a batch of strings, reusing lookups and results across the batch"""
+        table, width, index, accepting = self.table, self.width, self.symbol_index, self.accepting
+        start, get = self.start, index.get
+        seen = {}
+        results = []
+
+        for input_string in strings:
+            result = seen.get(input_string)
+            if result is None:
+                state = start
+                for symbol in input_string:
+                    column = get(symbol)
+                    if column is None:
+                        state = DEAD
+                        break
+                    state = table[state * width + column]
+                    if state == DEAD:
+                        break
+                result = seen[input_string] = bool(accepting[state])
+            results.append(result)
+
+        return results
+
+    def match_array(self, strings, chunk_size=1 << 20):
+        """Vectorized acceptance of a whole corpus, returns a numpy bool array"""
+        if np is None:
+            raise ImportError("match_array requires numpy")
+
+        # Two extra columns: unknown symbols go to the dead state, padding keeps the current state
+        states = len(self.state_names)
+        unknown, pad = self.width, self.width + 1
+        matrix = np.empty((states, self.width + 2), dtype=np.int32)
+        matrix[:, :self.width] = np.frombuffer(self.table, dtype=np.int32).reshape(states, self.width)
+        matrix[:, unknown] = DEAD
+        matrix[:, pad] = np.arange(states)
+        accepting = np.frombuffer(self.accepting, dtype=np.uint8).astype(bool)
+
+        strings = list(strings)
+        results = np.empty(len(strings), dtype=bool)
+        for begin in range(0, len(strings), chunk_size):
+            codes = self.encode_corpus(strings[begin:begin + chunk_size])
+            current = np.full(codes.shape[1], self.start, dtype=np.int32)
+            for column in codes:  # One fancy-indexed lookup advances every string at once
+                current = matrix[current, column]
+                if not current.any():
+                    break
+            results[begin:begin + len(current)] = accepting[current]
+
+        return results
+
+    def encode_corpus(self, strings):
+        """Encode strings as a (max_length, n) array of column indices, padded per row"""
+        if np is None:
+            raise ImportError("encode_corpus requires numpy")
+        if any(len(symbol) != 1 for symbol in self.symbols):
+            raise ValueError("Vectorized matching only supports single-character symbols")
+
+        unknown, pad = self.width, self.width + 1
+        dtype = np.uint8 if pad < 256 else np.uint16
+
+        # Lookup table from code point to column, anything past the alphabet is unknown
+        top = max(map(ord, self.symbols), default=0) + 1
+        lookup = np.full(top + 1, unknown, dtype=dtype)
+        for symbol, column in self.symbol_index.items():
+            lookup[ord(symbol)] = column
+
+        lengths = np.fromiter(map(len, strings), dtype=np.intp, count=len(strings))
+        points = np.frombuffer("".join(strings).encode("utf-32-le"), dtype="<u4")
+        flat = lookup[np.minimum(points, top)]
+
+        longest = int(lengths.max()) if len(strings) else 0
+        codes = np.full((len(strings), longest), pad, dtype=dtype)
+        codes[np.arange(longest) < lengths[:, None]] = flat
+        return np.ascontiguousarray(codes.T)
+
+
+class StreamMatcher:
+    """Incremental matcher that keeps only the current state between chunks"""
+
+    def __init__(self, dfa, encoding="utf-8"):
+        self.dfa = dfa
+        self.encoding = encoding
+        self.reset()
+
+    def reset(self):
+        self.state = self.dfa.start
+        self.consumed = 0  # Number of symbols read so far
+        self.decoder = codecs.getincrementaldecoder(self.encoding)()
+
+    def feed(self, chunk):
+        """Advance over a str or bytes chunk, bytes may split a character across calls"""
+        if self.state == DEAD:
+            return self.state
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            chunk = self.decoder.decode(chunk)
+
+        table, width, get = self.dfa.table, self.dfa.width, self.dfa.symbol_index.get
+        state = self.state
+        for symbol in chunk:
+            column = get(symbol)
+            if column is None:
+                state = DEAD
+                break
+            state = table[state * width + column]
+            if state == DEAD:
+                break
+
+        self.consumed += len(chunk)
+        self.state = state
+        return state
+
+    def dead(self):
+        return self.state == DEAD
+
+    def accepts(self):
+        if self.decoder.getstate()[0]:  # A dangling partial character is not a symbol
+            return False
+        return bool(self.dfa.accepting[self.state])
+
+
+def match_file(dfa, file, chunk_size=1 << 16, encoding="utf-8"):
+    """Scan an open file in fixed-size chunks, stopping at the first dead state"""
+    matcher = StreamMatcher(dfa, encoding)
+    while not matcher.dead():
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        matcher.feed(chunk)
+    return not matcher.dead() and matcher.accepts()
+
+
+def match_path(dfa, path, chunk_size=1 << 16, encoding="utf-8"):
+    """Scan a file through a memory map, so only the pages being read stay resident"""
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty files can't be mapped
+            return match_file(dfa, f, chunk_size, encoding)
+
+        with mapped:
+            matcher = StreamMatcher(dfa, encoding)
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, len(view), chunk_size):
+                    if matcher.dead():
+                        break
+                    matcher.feed(view[offset:offset + chunk_size])
+            finally:
+                view.release()
+            return not matcher.dead() and matcher.accepts()
+
+
+def compile_dfa(config):
+    """Compile the `delta`/`q0`/`F` automaton section into a CompiledDFA"""
+    delta, q0, F = config["delta"], config["q0"], set(config["F"])
+
+    # Intern states (q0 first, so it gets id 1) and symbols in a stable order
+    state_ids = {None: DEAD, q0: 1}
+    symbol_ids = {}
+    for state, moves in delta.items():
+        state_ids.setdefault(state, len(state_ids))
+        for symbol, next_state in moves.items():
+            symbol_ids.setdefault(symbol, len(symbol_ids))
+            state_ids.setdefault(next_state, len(state_ids))
+    for state in F:
+        state_ids.setdefault(state, len(state_ids))
+
+    width = len(symbol_ids)
+    table = array("i", bytes(4 * width * len(state_ids)))  # Everything starts in the dead state
+    for state, moves in delta.items():
+        row = state_ids[state] * width
+        for symbol, next_state in moves.items():
+            table[row + symbol_ids[symbol]] = state_ids[next_state]
+
+    accepting = bytearray(len(state_ids))
+    for state in F:
+        accepting[state_ids[state]] = 1
+
+    state_names = [None] * len(state_ids)
+    for state, i in state_ids.items():
+        state_names[i] = state
+
+    return CompiledDFA(state_names, symbol_ids, table, state_ids[q0], accepting)
+
+
+def save_dfa(dfa, path):
+    """Write a CompiledDFA in the binary format read by load_dfa"""
+    states = len(dfa.state_names)
+    parts = [HEADER.pack(MAGIC, VERSION, 0, states, dfa.width, dfa.start)]
+
+    names = [str(symbol) for symbol in dfa.symbols]
+    names += ["" if name is None else str(name) for name in dfa.state_names]
+    for name in names:
+        encoded = name.encode("utf-8")
+        parts.append(LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+
+    size = sum(map(len, parts))
+    parts.append(bytes(-size % 4))  # Align the table so it can be cast in place
+
+    table = array("i", dfa.table)
+    if sys.byteorder != "little":
+        table.byteswap()
+    parts.append(table.tobytes())
+
+    bitmap = bytearray((states + 7) // 8)
+    for state in range(states):
+        if dfa.accepting[state]:
+            bitmap[state >> 3] |= 1 << (state & 7)
+    parts.append(bytes(bitmap))
+
+    with open(path, "wb") as f:
+        f.write(b"".join(parts))
+
+
+def load_dfa(path):
+    """Map a saved automaton into memory, the transition table is used without copying"""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, _, states, width, start = HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a compiled automaton")
+    if version != VERSION:
+        raise ValueError(f"Unsupported automaton format version {version}")
+
+    offset = HEADER.size
+    names = []
+    for _ in range(width + states):
+        (length,) = LENGTH.unpack_from(mapped, offset)
+        offset += LENGTH.size
+        names.append(mapped[offset:offset + length].decode("utf-8"))
+        offset += length
+    offset += -offset % 4
+
+    table_size = 4 * states * width
+    view = memoryview(mapped)[offset:offset + table_size]
+    if sys.byteorder == "little":
+        table = view.cast("i")  # Shares the page cache with every other process mapping the file
+    else:
+        table = array("i", view.tobytes())
+        table.byteswap()
+    offset += table_size
+
+    bitmap = mapped[offset:offset + (states + 7) // 8]
+    accepting = bytes((bitmap[state >> 3] >> (state & 7)) & 1 for state in range(states))
+
+    symbols, state_names = names[:width], names[width:]
+    state_names[DEAD] = None
+    return CompiledDFA(state_names, symbols, table, start, accepting)
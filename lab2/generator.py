@@ -0,0 +1,395 @@
+import itertools
+import random
+import sys
+from functools import lru_cache
+
+# Nullable rules can keep a derivation going without adding to its minimum length, so every
+# derivation also gets this many expansions on top of max_length before it is abandoned
+EPSILON_BUDGET = 10000
+
+
+class StringGenerator:
+    """Random strings from a lab2 grammar, derived with an explicit stack"""
+
+    def __init__(self, grammar, max_length=None, max_expansions=None):
+        vt, production = set(grammar["vt"]), grammar["production"]
+        self.max_length = max_length
+        if max_expansions is None:
+            max_expansions = 4 * (max_length or 0) + EPSILON_BUDGET
+        self.max_expansions = max_expansions
+
+        # Non-terminals become ints and terminals stay strings, symbols with no rules derive ""
+        self.non_terminals = list(production)
+        index = {nt: i for i, nt in enumerate(self.non_terminals)}
+        self.start = index.get(grammar["start_symbol"])
+
+        def encode(rhs):
+            return [symbol if symbol in vt else index[symbol] for symbol in rhs if symbol in vt or symbol in index]
+
+        # rules[i] holds the productions of non-terminal i, reversed so they can be pushed as is
+        self.productions = [[tuple(encode(rhs)) for rhs in production[nt]] for nt in self.non_terminals]
+        self.rules = [[rhs[::-1] for rhs in rhs_list] for rhs_list in self.productions]
+
+        # Minimum length of anything a non-terminal can derive, used to cut hopeless derivations
+        infinity = float("inf")
+        self.min_length = [infinity] * len(self.non_terminals)
+        changed = True
+        while changed:
+            changed = False
+            for i, rhs_list in enumerate(self.productions):
+                for rhs in rhs_list:
+                    length = sum(1 if isinstance(symbol, str) else self.min_length[symbol] for symbol in rhs)
+                    if length < self.min_length[i]:
+                        self.min_length[i] = length
+                        changed = True
+        self.rule_lengths = [
+            [sum(1 if isinstance(symbol, str) else self.min_length[symbol] for symbol in rhs) for rhs in rhs_list]
+            for rhs_list in self.rules
+        ]
+        self.terminates = self.start is None or self.min_length[self.start] != infinity
+
+    def form_length(self, form):
+        """Shortest string a sentential form (tuple of encoded symbols) can derive"""
+        min_length = self.min_length
+        return sum(1 if isinstance(symbol, str) else min_length[symbol] for symbol in form)
+
+    def generate(self, rng=random):
+        """One string, or None if it would exceed max_length or max_expansions"""
+        if self.start is None:
+            return ""
+        if not self.terminates:
+            return None  # Every derivation from the start symbol is infinite
+
+        rules, rule_lengths, min_length = self.rules, self.rule_lengths, self.min_length
+        # With no cap, only rules that can never terminate (infinite minimum length) are cut
+        limit = self.max_length if self.max_length is not None else sys.maxsize
+        randrange = rng.randrange
+        expansions = self.max_expansions
+        output = []
+        stack = [self.start]
+        pending = min_length[self.start]  # Shortest possible length of what is still on the stack
+
+        while stack:
+            symbol = stack.pop()
+            if isinstance(symbol, str):
+                output.append(symbol)
+                continue
+
+            expansions -= 1
+            if expansions < 0:
+                return None
+            pending -= min_length[symbol]
+            choice = randrange(len(rules[symbol]))
+            pending += rule_lengths[symbol][choice]
+            if len(output) + pending > limit:
+                return None
+            stack.extend(rules[symbol][choice])
+
+        return "".join(output)
+
+    def generate_many(self, n, seed=None, max_attempts=None):
+        """n strings drawn with a private RNG, so a seed reproduces the same batch"""
+        if n and not self.terminates:
+            raise ValueError("The start symbol derives no finite string")
+        rng = random.Random(seed)
+        generate = self.generate
+        attempts = max_attempts if max_attempts is not None else 100 * n
+        results = []
+
+        while len(results) < n:
+            value = generate(rng)
+            if value is not None:
+                results.append(value)
+                continue
+
+            attempts -= 1
+            if attempts <= 0:
+                raise ValueError(f"Could not derive {n} strings within max_length={self.max_length} "
+                                 f"and max_expansions={self.max_expansions}")
+
+        return results
+
+
+def enumerate_language(grammar, max_length):
+    """Yield every distinct string of the grammar's language in shortlex order"""
+    generator = StringGenerator(grammar)
+    if generator.start is None or generator.min_length[generator.start] == 0:
+        yield ""
+    if generator.start is None:
+        return
+
+    # Without ε-productions every symbol derives at least one terminal, so a form's
+    # minimum length also bounds how many symbols it has and pruning on it is sound
+    generator = StringGenerator(epsilon_free(grammar))
+    for length in range(1, max_length + 1):
+        yield from strings_of_length(generator, length)
+
+
+def epsilon_free(grammar):
+    """Copy of a grammar without ε-productions, deriving the same non-empty strings"""
+    vt, production = set(grammar["vt"]), grammar["production"]
+    min_length = dict(zip(production, StringGenerator(grammar).min_length))
+    # Symbols with no rules derive "", as in StringGenerator
+    nullable = {symbol for rhs_list in production.values() for rhs in rhs_list for symbol in rhs
+                if symbol not in vt and min_length.get(symbol, 0) == 0}
+
+    # Non-terminals that can derive at least one terminal
+    non_empty = set()
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rhs_list in production.items():
+            if lhs not in non_empty and any(symbol in vt or symbol in non_empty for rhs in rhs_list for symbol in rhs):
+                non_empty.add(lhs)
+                changed = True
+
+    free = {}
+    for lhs, rhs_list in production.items():
+        variants = {}
+        for rhs in rhs_list:
+            # A nullable symbol may be dropped, and must be when it can only derive ""
+            options = [
+                ([symbol] if symbol in vt or symbol in non_empty or symbol not in nullable else []) +
+                ([""] if symbol in nullable else [])
+                for symbol in rhs
+            ]
+            for variant in itertools.product(*options):
+                variant = "".join(variant)
+                if variant:
+                    variants[variant] = None
+        free[lhs] = list(variants)
+
+    return {"vt": list(grammar["vt"]), "production": free, "start_symbol": grammar["start_symbol"]}
+
+
+def strings_of_length(generator, length):
+    # Depth-first over terminal prefixes: each node holds the set of sentential forms that
+    # can still follow its prefix, so a string is reached once however many derivations it has
+    stack = [("", {(generator.start,)})]
+    while stack:
+        prefix, forms = stack.pop()
+        remaining = length - len(prefix)
+        followers, complete = split_on_first_terminal(generator, forms, remaining)
+
+        if remaining == 0:
+            if complete:
+                yield prefix
+            continue
+
+        # Push in reverse so the smallest terminal is explored first
+        for terminal in sorted(followers, reverse=True):
+            stack.append((prefix + terminal, followers[terminal]))
+
+
+def split_on_first_terminal(generator, forms, remaining):
+    """Expand leftmost non-terminals until every form starts with a terminal or is empty"""
+    productions, form_length = generator.productions, generator.form_length
+
+    followers = {}
+    complete = False
+    seen = set()
+    pending = list(forms)
+
+    while pending:
+        form = pending.pop()
+        if form in seen:
+            continue
+        seen.add(form)
+
+        if not form:
+            complete = True
+        elif isinstance(form[0], str):
+            followers.setdefault(form[0], set()).add(form[1:])
+        else:
+            rest = form[1:]
+            for rhs in productions[form[0]]:
+                expanded = rhs + rest
+                if form_length(expanded) <= remaining:
+                    pending.append(expanded)
+
+    return followers, complete
+
+
+class UniformSampler:
+    """Strings of an exact length drawn uniformly, using memoized derivation counts
+
+    Every derivation of length n is equally likely, which for an unambiguous grammar
+    (such as the right-linear ones in config.json) means every string of length n is.
+    """
+
+    def __init__(self, grammar):
+        generator = StringGenerator(grammar)
+        self.start = generator.start
+        self.productions = generator.productions
+        if any(not rhs for rhs_list in self.productions for rhs in rhs_list):
+            raise ValueError("Uniform sampling needs a grammar without empty productions")
+        self.order = self.unit_order()
+
+        # counts[A][n]: derivations of length n from A
+        # suffixes[A][p][i][n]: derivations of length n from symbols i.. of production p of A
+        self.counts = [[0] for _ in self.productions]
+        self.suffixes = [[[[0] for _ in rhs] for rhs in rhs_list] for rhs_list in self.productions]
+        self.computed = 0
+
+    def unit_order(self):
+        """Non-terminals ordered so that B comes before A whenever A -> B"""
+        order, state = [], [0] * len(self.productions)  # 0 new, 1 in progress, 2 done
+        for root in range(len(self.productions)):
+            stack = [(root, False)]
+            while stack:
+                nt, leaving = stack.pop()
+                if leaving:
+                    state[nt] = 2
+                    order.append(nt)
+                    continue
+                if state[nt] == 2:
+                    continue
+                if state[nt] == 1:
+                    raise ValueError("Uniform sampling needs a grammar without cycles of unit productions")
+                state[nt] = 1
+                stack.append((nt, True))
+                for rhs in self.productions[nt]:
+                    if len(rhs) == 1 and not isinstance(rhs[0], str) and state[rhs[0]] != 2:
+                        stack.append((rhs[0], False))
+        return order
+
+    def symbol_count(self, symbol, length):
+        if isinstance(symbol, str):
+            return 1 if length == 1 else 0
+        return self.counts[symbol][length]
+
+    def extend(self, n):
+        """Fill the count tables bottom-up for every length up to n"""
+        for length in range(self.computed + 1, n + 1):
+            # Whole productions first: splits only look at shorter lengths, except unit rules
+            for nt in self.order:
+                total = 0
+                for p, rhs in enumerate(self.productions[nt]):
+                    suffix = self.suffixes[nt][p]
+                    if len(rhs) == 1:
+                        value = self.symbol_count(rhs[0], length)
+                    else:
+                        following = suffix[1]
+                        value = sum(
+                            self.symbol_count(rhs[0], k) * following[length - k]
+                            for k in range(1, length - len(rhs) + 2)
+                        )
+                    suffix[0].append(value)
+                    total += value
+                self.counts[nt].append(total)
+
+            # Then the proper suffixes, which now only depend on finished counts
+            for nt in self.order:
+                for p, rhs in enumerate(self.productions[nt]):
+                    suffix = self.suffixes[nt][p]
+                    last = len(rhs) - 1
+                    for i in range(last, 0, -1):
+                        if i == last:
+                            suffix[i].append(self.symbol_count(rhs[i], length))
+                        else:
+                            following = suffix[i + 1]
+                            suffix[i].append(sum(
+                                self.symbol_count(rhs[i], k) * following[length - k]
+                                for k in range(1, length - (last - i) + 1)
+                            ))
+            self.computed = length
+
+    def count(self, n):
+        if self.start is None:
+            return 1 if n == 0 else 0
+        self.extend(n)
+        return self.counts[self.start][n]
+
+    def sample(self, n, rng=random):
+        total = self.count(n)
+        if not total:
+            raise ValueError(f"The grammar derives no strings of length {n}")
+        if self.start is None:
+            return ""
+
+        output = []
+        stack = [(self.start, n)]
+        while stack:
+            symbol, length = stack.pop()
+            if isinstance(symbol, str):
+                output.append(symbol)
+                continue
+
+            # Pick a production with probability proportional to its derivation count
+            target = rng.randrange(self.counts[symbol][length])
+            for p, rhs in enumerate(self.productions[symbol]):
+                weight = self.suffixes[symbol][p][0][length]
+                if target < weight:
+                    break
+                target -= weight
+
+            # Then split the length between its symbols the same way
+            suffix = self.suffixes[symbol][p]
+            parts = []
+            for i in range(len(rhs) - 1):
+                target = rng.randrange(suffix[i][length])
+                for k in range(1, length):
+                    weight = self.symbol_count(rhs[i], k) * suffix[i + 1][length - k]
+                    if target < weight:
+                        break
+                    target -= weight
+                parts.append((rhs[i], k))
+                length -= k
+            parts.append((rhs[-1], length))
+            stack.extend(reversed(parts))
+
+        return "".join(output)
+
+    def sample_many(self, n, count, seed=None):
+        rng = random.Random(seed)
+        return [self.sample(n, rng) for _ in range(count)]
+
+
+def grammar_key(grammar):
+    production = grammar["production"]
+    return (
+        tuple(sorted(grammar["vt"])),
+        tuple((lhs, tuple(production[lhs])) for lhs in sorted(production)),
+        grammar["start_symbol"],
+    )
+
+
+@lru_cache(maxsize=32)
+def cached_sampler(key):
+    vt, production, start_symbol = key
+    return UniformSampler({"vt": list(vt), "production": dict(production), "start_symbol": start_symbol})
+
+
+def uniform_sampler(grammar):
+    """Shared UniformSampler per grammar, so its count tables are only built once"""
+    return cached_sampler(grammar_key(grammar))
+
+
+if __name__ == "__main__":
+    import json
+    import time
+
+    with open("config.json", "r") as f:
+        grammar = json.load(f)["grammar"]
+
+    generator = StringGenerator(grammar, max_length=12)
+    print(generator.generate_many(5, seed=1))
+    print(list(enumerate_language(grammar, 3)))
+
+    sampler = uniform_sampler(grammar)
+    print(f"{sampler.count(8)} strings of length 8, e.g. {sampler.sample_many(8, 3, seed=1)}")
+
+    # The config grammar is unambiguous, so derivation counts must match the enumeration
+    by_length = [0] * 9
+    for string in enumerate_language(grammar, 8):
+        by_length[len(string)] += 1
+    assert by_length[1:] == [sampler.count(n) for n in range(1, 9)]
+
+    # Nullable padding: the only form of length 1 needs five ε-expansions first
+    padded = {"vt": ["a"], "production": {"S": ["AAAAAa"], "A": [""]}, "start_symbol": "S"}
+    assert list(enumerate_language(padded, 3)) == ["a"]
+
+    start = time.perf_counter()
+    strings = generator.generate_many(200000, seed=2)
+    elapsed = time.perf_counter() - start
+    print(f"{len(strings)} strings in {elapsed:.2f}s ({len(strings) / elapsed * 60:,.0f} per minute)")
@@ -0,0 +1,54 @@
+from dfa import compile_dfa
+from minimize import minimize
+from ndfa_to_nfa import NFA, NFAtoDFAConverter
+
+
+def grammar_to_nfa(grammar):
+    """Build an NFA for a right-linear grammar (A -> aB, A -> a, A -> B, A -> '')"""
+    vt, production = set(grammar["vt"]), grammar["production"]
+
+    # Fresh names for the accepting state and the states inside multi-terminal productions
+    final_state = "F"
+    while final_state in production:
+        final_state += "'"
+    counter = 0
+
+    def fresh():
+        nonlocal counter
+        counter += 1
+        return f"{final_state}{counter}"
+
+    transitions = {nt: {} for nt in production}
+    transitions[final_state] = {}
+
+    def add(source, symbol, target):
+        transitions.setdefault(source, {}).setdefault(symbol, set()).add(target)
+
+    for lhs, rhs_list in production.items():
+        for rhs in rhs_list:
+            terminals, target = rhs, final_state
+            if rhs and rhs[-1] not in vt:
+                terminals, target = rhs[:-1], rhs[-1]
+            if any(symbol not in vt for symbol in terminals):
+                raise ValueError(f"Grammar is not right-linear: {lhs} -> {rhs}")
+
+            if not terminals:
+                add(lhs, '', target)  # Unit or empty production becomes an epsilon move
+                continue
+
+            current = lhs
+            for symbol in terminals[:-1]:
+                step = fresh()
+                add(current, symbol, step)
+                current = step
+            add(current, terminals[-1], target)
+
+    return NFA(set(transitions), vt, transitions, grammar["start_symbol"], {final_state})
+
+
+def compile_grammar(grammar, minimal=True):
+    """Compile a right-linear grammar all the way to a CompiledDFA"""
+    dfa = NFAtoDFAConverter(grammar_to_nfa(grammar)).to_dfa()
+    if minimal:
+        dfa = minimize(dfa)
+    return compile_dfa({"delta": dfa.transitions, "q0": dfa.initial_state, "F": list(dfa.final_states)})
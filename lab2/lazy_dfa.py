@@ -0,0 +1,111 @@
+from ndfa_to_nfa import IndexedNFA
+
+DEAD = -1  # Cached transition into the empty subset
+UNKNOWN = None  # Transition that hasn't been determinized yet
+
+
+class LazyDFA:
+    """Match against an NFA, building DFA states only when the input reaches them"""
+
+    def __init__(self, nfa, max_states=1024, max_flushes=4):
+        self.indexed = IndexedNFA(nfa)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.indexed.alphabet)}
+        self.max_states = max_states  # Size of the state cache before it is flushed
+        self.max_flushes = max_flushes  # Flushes allowed during one match before falling back
+
+        self.states_built = 0
+        self.cache_flushes = 0
+        self.fallbacks = 0
+        self.clear()
+
+    def clear(self):
+        self.state_ids = {}  # NFA subset bitmask -> cached DFA state id
+        self.subsets = []
+        self.next_states = []  # Per state, one slot per symbol
+        self.accepting = []
+
+    def add_state(self, subset):
+        state = len(self.subsets)
+        self.state_ids[subset] = state
+        self.subsets.append(subset)
+        self.next_states.append([UNKNOWN] * len(self.symbol_index))
+        self.accepting.append(bool(subset & self.indexed.final_mask))
+        self.states_built += 1
+        return state
+
+    def start_state(self):
+        subset = self.indexed.epsilon_closure(self.indexed.initial)
+        state = self.state_ids.get(subset)
+        return self.add_state(subset) if state is None else state
+
+    def matches(self, input_string):
+        nfa, index = self.indexed, self.symbol_index
+        flushes_allowed = self.cache_flushes + self.max_flushes
+        state = self.start_state()
+
+        for position, symbol in enumerate(input_string):
+            column = index.get(symbol)
+            if column is None:
+                return False
+
+            next_state = self.next_states[state][column]
+            if next_state is UNKNOWN:
+                subset = nfa.epsilon_closure(nfa.move(self.subsets[state], symbol))
+                if not subset:
+                    next_state = DEAD
+                else:
+                    next_state = self.state_ids.get(subset)
+                    if next_state is None:
+                        if len(self.subsets) >= self.max_states:
+                            # The cache is full: drop everything and start over, like RE2
+                            self.cache_flushes += 1
+                            self.clear()
+                            if self.cache_flushes > flushes_allowed:
+                                # Flushing keeps evicting states we still need, simulate instead
+                                self.fallbacks += 1
+                                return self.simulate(subset, input_string[position + 1:])
+                            state = self.add_state(subset)
+                            continue
+                        next_state = self.add_state(subset)
+                self.next_states[state][column] = next_state
+
+            if next_state == DEAD:
+                return False
+            state = next_state
+
+        return self.accepting[state]
+
+    def simulate(self, subset, input_string):
+        """Plain NFA simulation over bitmasks, nothing is cached"""
+        nfa = self.indexed
+        for symbol in input_string:
+            if symbol not in self.symbol_index:
+                return False
+            subset = nfa.epsilon_closure(nfa.move(subset, symbol))
+            if not subset:
+                return False
+        return bool(subset & nfa.final_mask)
+
+    def stats(self):
+        return {
+            "cached_states": len(self.subsets),
+            "states_built": self.states_built,
+            "cache_flushes": self.cache_flushes,
+            "fallbacks": self.fallbacks,
+        }
+
+
+if __name__ == "__main__":
+    from ndfa_to_nfa import NFA
+
+    # (a|b)*a(a|b)^12 needs 2^13 DFA states, far more than one input ever visits
+    k = 12
+    transitions = {'s': {'a': {'s', 'p0'}, 'b': {'s'}}}
+    for i in range(k):
+        transitions[f'p{i}'] = {'a': {f'p{i + 1}'}, 'b': {f'p{i + 1}'}}
+    nfa = NFA({'s'} | set(transitions) | {f'p{k}'}, {'a', 'b'}, transitions, 's', {f'p{k}'})
+
+    matcher = LazyDFA(nfa, max_states=256)
+    for word in ["a" + "b" * k, "b" * 40, "ab" * 30 + "a" * 13]:
+        print(f"{word[:20]}...: {matcher.matches(word)}")
+    print(matcher.stats())
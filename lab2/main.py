@@ -1,7 +1,9 @@
 import random
 import json
-from functools import reduce
-from collections import defaultdict
+from array import array
+from classify import classify_productions
+from dfa import CompiledDFA, compile_dfa
+from grammar_to_automaton import compile_grammar
 
 def load_config(filename):
     with open(filename, "r") as f:
@@ -9,104 +11,78 @@ def load_config(filename):
 
 def string_belongs_to_language(config, input_string):
     delta, q0, F = config["delta"], config["q0"], set(config["F"])
-    
-    final_state = reduce(
-        lambda state, symbol: delta.get(state, {}).get(symbol, None),
-        input_string,
-        q0
-    )
-    
-    return final_state in F if final_state else False
+
+    state = q0
+    for symbol in input_string:
+        state = delta.get(state, {}).get(symbol)
+        if state is None:  # Dead state, no need to read the rest of the input
+            return False
+
+    return state in F
+
+MAX_EXPANSIONS = 100000  # Derivations longer than this are treated as non-terminating
 
 def generate_from_non_terminal(production, vt, non_terminal):
     if non_terminal not in production:
         return ""
-    
-    return ''.join(
-        symbol if symbol in vt else generate_from_non_terminal(production, vt, symbol)
-        for symbol in random.choice(production[non_terminal])
-    )
+
+    # Explicit stack instead of recursion, so long right-recursive derivations can't overflow.
+    # A derivation that never ends (e.g. S -> aS only) still fails, once it runs out of expansions
+    output = []
+    stack = [non_terminal]
+    expansions = MAX_EXPANSIONS
+    while stack:
+        symbol = stack.pop()
+        if symbol in vt:
+            output.append(symbol)
+        elif symbol in production:
+            expansions -= 1
+            if expansions < 0:
+                raise RecursionError(f"Derivation from {non_terminal} did not end within {MAX_EXPANSIONS} expansions")
+            stack.extend(reversed(random.choice(production[symbol])))
+
+    return ''.join(output)
 
 def generate_string(config):
     return generate_from_non_terminal(config["production"], set(config["vt"]), config["start_symbol"])
 
 def ndfa_to_dfa(ndfa):
     Q, sigma, delta, q0, F = ndfa
+    symbols = sorted(sigma)
+    width = len(symbols)
 
-    # Initialize DFA components
-    dfa = defaultdict(dict)  # Transition table for DFA
-    dfa_states = []  # List of DFA states (sets of NDFA states)
-    dfa_final = set()  # Final states of DFA
-
-    # Start state of DFA is a frozenset containing just the start state of the NDFA
+    # DFA state 0 is the dead state, every subset of NDFA states gets the next free id
     start_state = frozenset([q0])
-    dfa_states.append(start_state)
-    if start_state & F:
-        dfa_final.add(start_state)
-
-    # Mapping from NDFA state sets to DFA state indices
-    state_map = {start_state: 0}
+    state_map = {start_state: 1}
+    dfa_states = [frozenset(), start_state]  # List of DFA states (sets of NDFA states)
+    table = array("i", bytes(4 * width * len(dfa_states)))  # Flat transition table
     unprocessed_states = [start_state]  # States to process
 
     while unprocessed_states:
         current_state = unprocessed_states.pop()
+        row = state_map[current_state] * width
 
-        for symbol in sigma:
+        for column, symbol in enumerate(symbols):
             # Get the new set of states after the symbol transition
             next_state = frozenset([q for s in current_state for q in delta[s].get(symbol, [])])
 
             if next_state:
                 if next_state not in state_map:
-                    # Add new state to DFA
+                    # Add new state to DFA and grow the table by one row
                     state_map[next_state] = len(dfa_states)
                     dfa_states.append(next_state)
-                    if next_state & F:
-                        dfa_final.add(next_state)
-
-                    # Add to unprocessed states if it's a new state
+                    table.extend([0] * width)
                     unprocessed_states.append(next_state)
 
-                # Add transition to DFA table (store state as frozenset)
-                dfa[state_map[current_state]][symbol] = state_map[next_state]
-
-    # Print only the state transitions in a readable format
-    print("State Transitions:")
-    for current_state in dfa_states:
-        current_state_str = f"{{{' ,'.join(map(str, current_state))}}}"
-        transitions = []
-        for symbol in sigma:
-            if symbol in dfa[state_map[current_state]]:
-                next_state = dfa[state_map[current_state]][symbol]
-                next_state_str = f"{{{' ,'.join(map(str, dfa_states[next_state]))}}}"
-                transitions.append(f"{symbol} -> {next_state_str}")
-        if transitions:
-            print(f"  {current_state_str}: {', '.join(transitions)}")
-
-def classify_grammar(grammar):
-    vt, production = set(grammar["vt"]), grammar["production"]
-
-    results = [
-        (
-            len(lhs) == 1 and lhs.isupper(), 
-            list(map(lambda rhs: (
-                all(symbol in vt or symbol.isupper() for symbol in rhs) and 
-                (len(rhs) == 1 or (len(rhs) == 2 and rhs[1].isupper())),
-                len(rhs) >= len(lhs)
-            ), rhs_list))
-        )
-        for lhs, rhs_list in production.items()
-    ]
+                table[row + column] = state_map[next_state]
 
-    is_regular = all(lhs_ok and all(rhs_ok for rhs_ok, _ in rhs_checks) for lhs_ok, rhs_checks in results)
+    accepting = [1 if state & F else 0 for state in dfa_states]
+    state_names = [f"{{{' ,'.join(map(str, state))}}}" for state in dfa_states]
+    return CompiledDFA(state_names, symbols, table, 1, accepting)
 
-    is_context_free = all(lhs_ok for lhs_ok, _ in results)
-
-    is_context_sensitive = all(all(sensitive_ok for _, sensitive_ok in rhs_checks) for _, rhs_checks in results)
-
-    return ("Regular Grammar (Type 3)" if is_regular else
-            "Context-Free Grammar (Type 2)" if is_context_free else
-            "Context-Sensitive Grammar (Type 1)" if is_context_sensitive else
-            "Recursively Enumerable Grammar (Type 0)")
+def classify_grammar(grammar):
+    level, _ = classify_productions(grammar)
+    return level
 
 if __name__ == "__main__":
     random.seed()
@@ -118,6 +94,13 @@ if __name__ == "__main__":
     
     test_string = "abce"
     print(f'\nDoes string "{test_string}" belong to the language? {string_belongs_to_language(config["automaton"], test_string)}')
+
+    compiled = compile_dfa(config["automaton"])
+    batch = ["abce", "ae", "bfa", "abd", "ba"]
+    print(f"Batch match {batch}: {compiled.match_many(batch)}")
+
+    grammar_dfa = compile_grammar(config["grammar"])
+    print(f"Batch match from the grammar {batch}: {grammar_dfa.match_many(batch)}")
    
     print(classify_grammar(config["grammar"]))
 
@@ -136,3 +119,4 @@ if __name__ == "__main__":
 
     dfa = ndfa_to_dfa(ndfa)
     print(dfa)
+    print(f'Does the DFA accept "aab"? {dfa.match("aab")}')
@@ -0,0 +1,169 @@
+from ndfa_to_nfa import FiniteAutomaton
+
+
+def reachable_states(dfa):
+    """States reachable from the initial state, in breadth-first order"""
+    seen = {dfa.initial_state: None}
+    queue = [dfa.initial_state]
+    for state in queue:
+        for next_state in dfa.transitions.get(state, {}).values():
+            if next_state not in seen:
+                seen[next_state] = None
+                queue.append(next_state)
+    return queue
+
+
+def minimize(dfa):
+    """Minimize a (possibly partial) DFA with Hopcroft's partition refinement"""
+    alphabet = [symbol for symbol in dfa.alphabet if symbol != '']
+    states = reachable_states(dfa)
+    dead = len(states)  # Implicit trap state that completes the partial transition function
+    index = {state: i for i, state in enumerate(states)}
+    final_states = set(dfa.final_states)
+
+    # inverse[symbol][j] lists every state that moves into j on symbol
+    inverse = {symbol: [[] for _ in range(dead + 1)] for symbol in alphabet}
+    for i, state in enumerate(states):
+        moves = dfa.transitions.get(state, {})
+        for symbol in alphabet:
+            j = index[moves[symbol]] if symbol in moves else dead
+            inverse[symbol][j].append(i)
+    for symbol in alphabet:
+        inverse[symbol][dead].append(dead)
+
+    accepting = {i for i, state in enumerate(states) if state in final_states}
+    rejecting = set(range(dead + 1)) - accepting
+    blocks = [block for block in (accepting, rejecting) if block]
+    block_of = [0] * (dead + 1)
+    for b, block in enumerate(blocks):
+        for i in block:
+            block_of[i] = b
+
+    # Seeding with the smaller block only is what gives the n log n bound
+    smallest = min(range(len(blocks)), key=lambda b: len(blocks[b]))
+    work = {(smallest, symbol) for symbol in alphabet} if len(blocks) > 1 else set()
+
+    while work:
+        splitter, symbol = work.pop()
+        predecessors = set()
+        for j in blocks[splitter]:
+            predecessors.update(inverse[symbol][j])
+
+        touched = {}
+        for i in predecessors:
+            touched.setdefault(block_of[i], set()).add(i)
+
+        for b, inside in touched.items():
+            if len(inside) == len(blocks[b]):
+                continue
+
+            # Split in place, so a split costs O(|inside|) and never builds the complement
+            block = blocks[b]
+            block -= inside
+            new = len(blocks)
+            if len(inside) <= len(block):
+                blocks.append(inside)
+                small = inside
+            else:
+                blocks[b] = inside  # The rest is the smaller half, it becomes the new block
+                blocks.append(block)
+                small = block
+            for i in small:
+                block_of[i] = new
+
+            # Whether or not (b, c) is pending, adding the smaller half is enough
+            for c in alphabet:
+                work.add((new, c))
+
+    # Name each block after its first reachable member and drop the trap block
+    names = {}
+    for i, state in enumerate(states):
+        names.setdefault(block_of[i], state)
+    dead_block = block_of[dead]
+
+    transitions = {}
+    for b, name in names.items():
+        if b == dead_block:
+            continue
+        moves = dfa.transitions.get(name, {})
+        transitions[name] = {
+            symbol: names[block_of[index[moves[symbol]]]]
+            for symbol in alphabet
+            if symbol in moves and block_of[index[moves[symbol]]] != dead_block
+        }
+
+    initial_block = block_of[0]
+    if initial_block == dead_block:  # Empty language, keep a lone non-accepting start state
+        transitions[dfa.initial_state] = {}
+
+    return FiniteAutomaton(
+        states=list(transitions),
+        alphabet=alphabet,
+        transitions=transitions,
+        initial_state=dfa.initial_state,
+        final_states={name for name in transitions if name in final_states}
+    )
+
+
+def equivalent(dfa1, dfa2):
+    """Check two DFAs accept the same language (Hopcroft-Karp union-find)"""
+    alphabet = {symbol for symbol in dfa1.alphabet if symbol != ''}
+    alphabet.update(symbol for symbol in dfa2.alphabet if symbol != '')
+    automata = (dfa1, dfa2)
+    finals = (set(dfa1.final_states), set(dfa2.final_states))
+
+    parent = {}
+
+    def find(node):
+        root = node
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while node != root:  # Path compression
+            parent[node], node = root, parent.get(node, node)
+        return root
+
+    def accepts(node):
+        side, state = node
+        return state is not None and state in finals[side]
+
+    def step(node, symbol):
+        side, state = node
+        if state is None:
+            return node
+        return (side, automata[side].transitions.get(state, {}).get(symbol))
+
+    # States are tagged with their automaton, None is each side's trap state
+    pending = [((0, dfa1.initial_state), (1, dfa2.initial_state))]
+    while pending:
+        left, right = pending.pop()
+        left_root, right_root = find(left), find(right)
+        if left_root == right_root:
+            continue
+        if accepts(left) != accepts(right):
+            return False
+
+        parent[left_root] = right_root
+        for symbol in alphabet:
+            pending.append((step(left, symbol), step(right, symbol)))
+
+    return True
+
+
+if __name__ == "__main__":
+    # {a, b}* ending in "ab", written with a redundant copy of the start state
+    dfa = FiniteAutomaton(
+        states=['q0', 'q1', 'q2', 'q3'],
+        alphabet=['a', 'b'],
+        transitions={
+            'q0': {'a': 'q1', 'b': 'q3'},
+            'q1': {'a': 'q1', 'b': 'q2'},
+            'q2': {'a': 'q1', 'b': 'q3'},
+            'q3': {'a': 'q1', 'b': 'q0'}
+        },
+        initial_state='q0',
+        final_states={'q2'}
+    )
+
+    minimal = minimize(dfa)
+    print(minimal)
+    print("Equivalent to the original:", equivalent(dfa, minimal))
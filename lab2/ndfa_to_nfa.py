@@ -1,3 +1,7 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+
 class FiniteAutomaton:
     def __init__(self, states, alphabet, transitions, initial_state, final_states):
         self.states = states
@@ -17,75 +21,203 @@ class NFA:
         self.initial_state = initial_state
         self.final_states = final_states
 
+class IndexedNFA:
+    """NFA with states interned to bit positions, so a set of states is a single int"""
+
+    def __init__(self, nfa, closure_cache_size=4096):
+        names = set(nfa.states) | set(nfa.transitions) | {nfa.initial_state} | set(nfa.final_states)
+        for edges in nfa.transitions.values():
+            for targets in edges.values():
+                names.update(targets)
+
+        # Sorting once here means a subset's key comes out sorted for free
+        self.names = sorted(names, key=str)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.alphabet = [symbol for symbol in nfa.alphabet if symbol != '']
+
+        # moves[symbol][i] is the bitmask of states reachable from state i on symbol
+        self.moves = {symbol: [0] * len(self.names) for symbol in self.alphabet}
+        self.epsilon = [0] * len(self.names)
+        for state, edges in nfa.transitions.items():
+            i = self.index[state]
+            for symbol, targets in edges.items():
+                if symbol == '':
+                    self.epsilon[i] |= self.to_mask(targets)
+                elif symbol in self.moves:
+                    self.moves[symbol][i] |= self.to_mask(targets)
+
+        self.initial = 1 << self.index[nfa.initial_state]
+        self.final_mask = self.to_mask(nfa.final_states)
+
+        # closures[i] is the full epsilon closure of state i, subsets just OR these together
+        self.closures = self.state_closures()
+        self.epsilon_closure = lru_cache(maxsize=closure_cache_size)(self.subset_closure)
+
+    def to_mask(self, states):
+        mask = 0
+        for state in states:
+            mask |= 1 << self.index[state]
+        return mask
+
+    def to_states(self, mask):
+        return {self.names[i] for i in bits(mask)}
+
+    def to_string(self, mask):
+        return ','.join(str(self.names[i]) for i in bits(mask))
+
+    def move(self, mask, symbol):
+        row = self.moves[symbol]
+        result = 0
+        for i in bits(mask):
+            result |= row[i]
+        return result
+
+    def subset_closure(self, mask):
+        closures = self.closures
+        closure = mask
+        for i in bits(mask):
+            closure |= closures[i]
+        return closure
+
+    def state_closures(self):
+        """Epsilon reachability for every state, computed once over the SCC condensation"""
+        count = len(self.names)
+        closures = [0] * count
+        order = [None] * count  # Tarjan discovery index
+        low = [0] * count
+        on_stack = [False] * count
+        stack = []
+        counter = 0
+
+        for root in range(count):
+            if order[root] is not None:
+                continue
+
+            # Iterative Tarjan, so long epsilon chains don't hit the recursion limit
+            work = [(root, bits(self.epsilon[root]))]
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+
+            while work:
+                state, successors = work[-1]
+                for successor in successors:
+                    if order[successor] is None:
+                        order[successor] = low[successor] = counter
+                        counter += 1
+                        stack.append(successor)
+                        on_stack[successor] = True
+                        work.append((successor, bits(self.epsilon[successor])))
+                        break
+                    if on_stack[successor]:
+                        low[state] = min(low[state], order[successor])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[state])
+
+                    if low[state] == order[state]:
+                        # SCCs come out sinks first, so every successor component is already done
+                        members = 0
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = False
+                            members |= 1 << member
+                            if member == state:
+                                break
+
+                        reach = members
+                        for member in bits(members):
+                            for successor in bits(self.epsilon[member] & ~members):
+                                reach |= closures[successor]
+                        for member in bits(members):
+                            closures[member] = reach
+
+        return closures
+
+
+def bits(mask):
+    # Yield the positions of the set bits, lowest first
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
 class NFAtoDFAConverter:
-    def __init__(self, nfa):
+    def __init__(self, nfa, closure_cache_size=4096):
         self.nfa = nfa
         self.alphabet = list(nfa.alphabet)  # Alphabet of the NFA
         self.states = []  # List of DFA states (each state is a set of NFA states)
         self.transitions = {}  # DFA transitions
         self.final_states = set()  # DFA final states
         self.initial_state = None  # DFA initial state
+        self.indexed = IndexedNFA(nfa, closure_cache_size)  # NFA with interned integer states
+        self.subsets = []  # DFA states as NFA bitmasks, parallel to self.states
+        self.subset_index = {}  # Bitmask -> position in self.subsets
+        self.keys = []  # Each subset is stringified once, when it is first discovered
         self.convert()  # Perform the conversion
 
     def convert(self):
+        nfa = self.indexed
+
         # Start with the initial state of the NFA and get its epsilon closure
-        initial_dfa_state = self.epsilon_closure({self.nfa.initial_state})
-        self.states.append(initial_dfa_state)
-        self.initial_state = self.state_to_string(initial_dfa_state)
+        initial_dfa_state = nfa.epsilon_closure(nfa.initial)
+        self.initial_state = self.keys[self.add_subset(initial_dfa_state)]
 
         unprocessed_states = [initial_dfa_state]
 
         while unprocessed_states:
             current_state = unprocessed_states.pop()
-            state_key = self.state_to_string(current_state)
-            self.transitions[state_key] = {}
+            successors = [nfa.epsilon_closure(nfa.move(current_state, symbol)) for symbol in nfa.alphabet]
+            unprocessed_states.extend(self.add_transitions(current_state, successors))
 
-            for symbol in self.alphabet:
-                next_state = self.epsilon_closure(self.move(current_state, symbol))
-                if next_state:
-                    next_state_key = self.state_to_string(next_state)
+    def add_subset(self, subset):
+        self.subset_index[subset] = len(self.subsets)
+        self.subsets.append(subset)
+        self.states.append(self.indexed.to_states(subset))
+        self.keys.append(self.indexed.to_string(subset))
+        return self.subset_index[subset]
 
-                    # If the next state is new, add it to the list of states
-                    if not any(self.state_to_string(s) == next_state_key for s in self.states):
-                        self.states.append(next_state)
-                        unprocessed_states.append(next_state)
+    def add_transitions(self, current_state, successors):
+        """Record one DFA state's row, returning the subsets discovered for the first time"""
+        state_key = self.keys[self.subset_index[current_state]]
+        self.transitions[state_key] = {}
+        discovered = []
 
-                    # Add the transition to the DFA
-                    if symbol not in self.transitions[state_key]:
-                        self.transitions[state_key][symbol] = []
-                    self.transitions[state_key][symbol].append(next_state_key)
+        for symbol, next_state in zip(self.indexed.alphabet, successors):
+            if next_state:
+                # Known subsets are found with a single dict lookup
+                next_id = self.subset_index.get(next_state)
+                if next_id is None:
+                    next_id = self.add_subset(next_state)
+                    discovered.append(next_state)
 
-            # Check if the current state contains any NFA final states
-            if any(state in self.nfa.final_states for state in current_state):
-                self.final_states.add(state_key)
+                self.transitions[state_key][symbol] = [self.keys[next_id]]
+
+        # Check if the current state contains any NFA final states
+        if current_state & self.indexed.final_mask:
+            self.final_states.add(state_key)
+
+        return discovered
 
     def epsilon_closure(self, states):
-        closure = set(states)
-        stack = list(states)
-
-        # Loop to calculate the epsilon closure
-        while stack:
-            state = stack.pop()
-            if state in self.nfa.transitions:
-                # Check if there is a transition for epsilon (empty string)
-                if '' in self.nfa.transitions[state]:
-                    for next_state in self.nfa.transitions[state]['']:
-                        if next_state not in closure:
-                            closure.add(next_state)
-                            stack.append(next_state)
+        mask = self.indexed.epsilon_closure(self.indexed.to_mask(states))
+        return self.indexed.to_states(mask)
 
-        return closure
+    def closure_cache_info(self):
+        # Hit/miss counters of the bounded subset-closure cache
+        return self.indexed.epsilon_closure.cache_info()
 
     def move(self, states, symbol):
-        result = set()
-        # Loop over all states to get the set of reachable states on the given symbol
-        for state in states:
-            if state in self.nfa.transitions and symbol in self.nfa.transitions[state]:
-                result.update(self.nfa.transitions[state][symbol])
-        return result
+        if symbol not in self.indexed.moves:
+            return set()
+        return self.indexed.to_states(self.indexed.move(self.indexed.to_mask(states), symbol))
 
     def state_to_string(self, state_set):
-        return ','.join(sorted(state_set))
+        return ','.join(sorted(map(str, state_set)))
 
     def to_dfa(self):
         # Convert states to strings
@@ -107,23 +239,86 @@ class NFAtoDFAConverter:
             final_states=self.final_states
         )
 
-# Example NFA
-nfa_states = {'q0', 'q1', 'q2', 'q3'}
-alphabet = {'a', 'c', 'b'}
-transitions = {
-    'q0': {'a': {'q0', 'q1'}},
-    'q1': {'c': {'q1'}, 'b': {'q2'}},
-    'q2': {'b': {'q3'}},
-    'q3': {'a': {'q1'}}
-}
-initial_state = 'q0'
-final_states = {'q2'}
-
-nfa = NFA(nfa_states, alphabet, transitions, initial_state, final_states)
-
-# Convert NFA to DFA
-converter = NFAtoDFAConverter(nfa)
-dfa = converter.to_dfa()
-
-# Print the DFA
-print(dfa)
+# Per-process copy of the NFA tables used by ParallelNFAtoDFAConverter workers
+_worker_tables = None
+
+
+def _init_worker(alphabet, moves, closures):
+    global _worker_tables
+    _worker_tables = (alphabet, moves, closures)
+
+
+def _expand_subsets(subsets):
+    """Successor subsets (already epsilon-closed) of each subset, one per symbol"""
+    alphabet, moves, closures = _worker_tables
+    rows = []
+    for subset in subsets:
+        members = list(bits(subset))
+        row = []
+        for symbol in alphabet:
+            targets = moves[symbol]
+            moved = 0
+            for i in members:
+                moved |= targets[i]
+            closure = moved
+            for i in bits(moved):
+                closure |= closures[i]
+            row.append(closure)
+        rows.append(row)
+    return rows
+
+
+class ParallelNFAtoDFAConverter(NFAtoDFAConverter):
+    """Subset construction that expands the frontier across a process pool"""
+
+    def __init__(self, nfa, workers=None, batch_size=512, closure_cache_size=4096):
+        self.workers = workers
+        self.batch_size = batch_size
+        super().__init__(nfa, closure_cache_size)
+
+    def convert(self):
+        nfa = self.indexed
+        initial_dfa_state = nfa.epsilon_closure(nfa.initial)
+        self.initial_state = self.keys[self.add_subset(initial_dfa_state)]
+        frontier = [initial_dfa_state]
+
+        # Workers only compute successors, interning stays here so subsets are deduplicated once
+        tables = (nfa.alphabet, nfa.moves, nfa.closures)
+        with ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=tables) as pool:
+            while frontier:
+                if len(frontier) < self.batch_size:
+                    # Not worth the round trip, expand small frontiers in this process
+                    _init_worker(*tables)
+                    batches = [frontier]
+                    results = [_expand_subsets(frontier)]
+                else:
+                    batches = [frontier[i:i + self.batch_size] for i in range(0, len(frontier), self.batch_size)]
+                    results = pool.map(_expand_subsets, batches)
+
+                frontier = []
+                for batch, rows in zip(batches, results):
+                    for current_state, successors in zip(batch, rows):
+                        frontier.extend(self.add_transitions(current_state, successors))
+
+
+if __name__ == "__main__":
+    # Example NFA
+    nfa_states = {'q0', 'q1', 'q2', 'q3'}
+    alphabet = {'a', 'c', 'b'}
+    transitions = {
+        'q0': {'a': {'q0', 'q1'}},
+        'q1': {'c': {'q1'}, 'b': {'q2'}},
+        'q2': {'b': {'q3'}},
+        'q3': {'a': {'q1'}}
+    }
+    initial_state = 'q0'
+    final_states = {'q2'}
+
+    nfa = NFA(nfa_states, alphabet, transitions, initial_state, final_states)
+
+    # Convert NFA to DFA
+    converter = NFAtoDFAConverter(nfa)
+    dfa = converter.to_dfa()
+
+    # Print the DFA
+    print(dfa)
@@ -1,4 +1,6 @@
 import re
+from collections import deque
+from functools import lru_cache
 
 TOKEN_TYPES = [
     ("CHUNK", r'chunk\d+'),
@@ -26,29 +28,110 @@ TOKEN_TYPES = [
 ]
 
 TOKEN_REGEX = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in TOKEN_TYPES)
+SEPARATORS = " \t\n"  # Characters no token other than WHITESPACE can contain
+
+
+@lru_cache(maxsize=None)
+def compile_token_spec(token_types):
+    """Compile a token spec (tuple of (name, pattern) pairs) once, however many lexers use it"""
+    return re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in token_types))
+
+
+EOF_TOKEN = ("EOF", None)
+
+
+class TokenStream:
+    """Pulls tokens from an iterator on demand, with a small lookahead buffer for peek()"""
+
+    def __init__(self, tokens):
+        self.tokens = iter(tokens)
+        self.lookahead = deque()
+
+    def next_token(self):
+        if self.lookahead:
+            return self.lookahead.popleft()
+        return next(self.tokens, EOF_TOKEN)
+
+    def peek(self, k=1):
+        # k-th upcoming token without consuming it, EOF once the input is exhausted
+        while len(self.lookahead) < k:
+            self.lookahead.append(next(self.tokens, EOF_TOKEN))
+        return self.lookahead[k - 1]
+
+    def __iter__(self):
+        while True:
+            token = self.next_token()
+            yield token
+            if token == EOF_TOKEN:
+                return
 
 
 class Lexer:
-    def __init__(self, text):
-        self.text = text
-        self.tokens = self.tokenize()
+    def __init__(self, source=None, token_types=TOKEN_TYPES, chunk_size=1 << 16):
+        self.pattern = compile_token_spec(tuple(map(tuple, token_types)))
+        self.chunk_size = chunk_size
+        self.stream = TokenStream(())
+        if source is not None:
+            self.reset(source)
+
+    def reset(self, source):
+        # Reuse this lexer (and its compiled pattern) for another text or file object
+        self.stream = TokenStream(self.iter_tokens(source))
+
+    def iter_tokens(self, source):
+        """Lazily yield the tokens of a string or a text file object, ending with EOF"""
+        if isinstance(source, str):
+            yield from self.scan(source)
+        else:
+            # scan() only consumes the part of a buffer that no later input can change and
+            # returns where it stopped, the rest is scanned again with the next chunk. That only
+            # happens once at least as much new text has arrived, which keeps rescans linear
+            pending = ""
+            parts, fresh = [], 0
+            while True:
+                chunk = source.read(self.chunk_size)
+                if not chunk:
+                    break
+                parts.append(chunk)
+                fresh += len(chunk)
+                if fresh < len(pending):
+                    continue
+                text = pending + "".join(parts)
+                parts, fresh = [], 0
+                resume = yield from self.scan(text, final=False)
+                pending = text[resume:]
+            yield from self.scan(pending + "".join(parts))
+
+        yield EOF_TOKEN  # Add end of file token
 
-    def tokenize(self):
-        tokens = []
-        for match in re.finditer(TOKEN_REGEX, self.text):
+    def scan(self, text, final=True):
+        # Unless final, only the part of text that more input can't change is scanned, and
+        # its length is returned
+        if not final:
+            # Only whitespace contains separators in the default spec, so everything up to the
+            # last one can't change. A custom spec gives no such guarantee
+            if self.pattern.pattern != TOKEN_REGEX:
+                raise ValueError("Custom token specs can't be lexed from a file in chunks, read the file into a string")
+            text = text[:max(text.rfind(separator) for separator in SEPARATORS) + 1]
+
+        for match in self.pattern.finditer(text):
             token_type = match.lastgroup
-            value = match.group()
 
             if token_type == "WHITESPACE":  # Ignore spaces and newlines
                 continue
 
-            tokens.append((token_type, value))
-        
-        tokens.append(("EOF", None))  # Add end of file token
-        return tokens
+            yield (token_type, match.group())
+
+        return len(text)
+
+    def tokenize(self, text):
+        return list(self.iter_tokens(text))
 
     def next_token(self):
-        return self.tokens.pop(0) if self.tokens else ("EOF", None)
+        return self.stream.next_token()
+
+    def peek(self, k=1):
+        return self.stream.peek(k)
 
 
 # Example usage:
@@ -71,5 +154,5 @@ if __name__ == "__main__":
     }
     """
     lexer = Lexer(code)
-    for token in lexer.tokens:
+    for token in lexer.stream:
         print(token)
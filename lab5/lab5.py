@@ -66,6 +66,20 @@ class Grammar:
             
         return cls(non_terminals, terminals, productions, start_symbol)
 
+def split_symbols(production, non_terminals):
+    """Split a production string into symbols, matching the longest non-terminal name first"""
+    if production == 'ε':
+        return []
+
+    names = sorted((nt for nt in non_terminals if len(nt) > 1), key=len, reverse=True)
+    symbols = []
+    i = 0
+    while i < len(production):
+        name = next((nt for nt in names if production.startswith(nt, i)), production[i])
+        symbols.append(name)
+        i += len(name)
+    return symbols
+
 def convert_to_cnf_variant_1(grammar):
     """Convert a grammar to Chomsky Normal Form using Variant 1 approach"""
     print("\nStep 1: Eliminate ε-productions")
@@ -368,7 +382,9 @@ def convert_to_cnf_final(grammar):
         final_productions[nt] = []
         
         for prod in prods:
-            if len(prod) <= 2:
+            # Terminal placeholders like T_a are several characters long, so count symbols
+            symbols = split_symbols(prod, new_grammar.non_terminals)
+            if len(symbols) <= 2:
                 # Keep productions with 1 or 2 symbols
                 final_productions[nt].append(prod)
             else:
@@ -377,7 +393,6 @@ def convert_to_cnf_final(grammar):
                 
                 # Create a new non-terminal for the first two symbols
                 first_nt = nt
-                symbols = list(prod)
                 
                 for i in range(0, len(symbols) - 2):
                     new_var = f"X_{next_new_var}"
@@ -0,0 +1,183 @@
+from lab5 import split_symbols
+
+
+def bits(mask):
+    # Positions of the set bits, lowest first
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class CYKRecognizer:
+    """CYK membership test for a grammar in Chomsky Normal Form, cells are non-terminal bitmasks"""
+
+    def __init__(self, grammar):
+        self.non_terminals = sorted(grammar.non_terminals)
+        index = {nt: i for i, nt in enumerate(self.non_terminals)}
+        # Conversion drops the start symbol when the language is empty, nothing is accepted then
+        self.start = 1 << index[grammar.start_symbol] if grammar.start_symbol in index else 0
+
+        self.accepts_empty = False
+        self.terminal_masks = {}  # a -> every A with A -> a
+        self.binary_rules = [[] for _ in self.non_terminals]  # B -> [(C, bit of A)] for A -> BC
+
+        for nt, prods in grammar.productions.items():
+            bit = 1 << index[nt]
+            for prod in prods:
+                symbols = split_symbols(prod, grammar.non_terminals)
+                if not symbols and nt == grammar.start_symbol:
+                    self.accepts_empty = True
+                elif len(symbols) == 1 and symbols[0] not in index:
+                    self.terminal_masks[symbols[0]] = self.terminal_masks.get(symbols[0], 0) | bit
+                elif len(symbols) == 2 and all(symbol in index for symbol in symbols):
+                    self.binary_rules[index[symbols[0]]].append((index[symbols[1]], bit))
+                else:
+                    raise ValueError(f"Not in Chomsky Normal Form: {nt} -> {prod}")
+
+    def accepts(self, word):
+        n = len(word)
+        if n == 0:
+            return self.accepts_empty
+
+        count = len(self.non_terminals)
+        # ends[B][i] has bit k set when B derives word[i:k], starts[C][k] has bit i set when
+        # C derives word[i:k], so A -> BC covers word[i:j] iff ends[B][i] & starts[C][j]
+        ends = [[0] * (n + 1) for _ in range(count)]
+        starts = [[0] * (n + 1) for _ in range(count)]
+        begins = [0] * (n + 1)  # Non-terminals with at least one span starting at i
+
+        def record(cell, i, j):
+            for a in bits(cell):
+                ends[a][i] |= 1 << j
+                starts[a][j] |= 1 << i
+            begins[i] |= cell
+
+        cell = 0
+        for i, symbol in enumerate(word):
+            cell = self.terminal_masks.get(symbol, 0)
+            if not cell:
+                return False
+            record(cell, i, i + 1)
+
+        for length in range(2, n + 1):
+            for i in range(n - length + 1):
+                j = i + length
+                cell = 0
+                for b in bits(begins[i]):
+                    left = ends[b][i]
+                    for c, a_bit in self.binary_rules[b]:
+                        if not cell & a_bit and left & starts[c][j]:
+                            cell |= a_bit
+                if cell:
+                    record(cell, i, j)
+
+        return bool(cell & self.start)  # The last cell computed is the whole word
+
+
+class EarleyRecognizer:
+    """Earley membership test for any context-free grammar, including ε-productions"""
+
+    def __init__(self, grammar):
+        self.rules = [((None,), None)]  # Rule 0 is the augmented S' -> S
+        self.by_lhs = {}
+        for nt, prods in grammar.productions.items():
+            for prod in prods:
+                self.by_lhs.setdefault(nt, []).append(len(self.rules))
+                self.rules.append((tuple(split_symbols(prod, grammar.non_terminals)), nt))
+        self.rules[0] = ((grammar.start_symbol,), None)
+
+        # Nullable non-terminals let prediction step over them (Aycock & Horspool)
+        self.nullable = set()
+        changed = True
+        while changed:
+            changed = False
+            for rhs, lhs in self.rules[1:]:
+                if lhs not in self.nullable and all(symbol in self.nullable for symbol in rhs):
+                    self.nullable.add(lhs)
+                    changed = True
+
+    def accepts(self, word):
+        n = len(word)
+        rules, by_lhs, nullable = self.rules, self.by_lhs, self.nullable
+        charts = [[] for _ in range(n + 1)]
+        seen = [set() for _ in range(n + 1)]
+        waiting = [{} for _ in range(n + 1)]  # waiting[i][A]: items at i with A after the dot
+
+        def add(position, item):
+            if item not in seen[position]:
+                seen[position].add(item)
+                charts[position].append(item)
+
+        add(0, (0, 0, 0))
+        for position in range(n + 1):
+            chart = charts[position]
+            symbol_here = word[position] if position < n else None
+            k = 0
+            while k < len(chart):
+                rule, dot, origin = chart[k]
+                k += 1
+                rhs, lhs = rules[rule]
+
+                if dot == len(rhs):
+                    # Complete: advance everything that was waiting for lhs at origin
+                    for waiting_rule, waiting_dot, waiting_origin in waiting[origin].get(lhs, ()):
+                        add(position, (waiting_rule, waiting_dot + 1, waiting_origin))
+                    continue
+
+                symbol = rhs[dot]
+                if symbol in by_lhs:
+                    waiting[position].setdefault(symbol, []).append((rule, dot, origin))
+                    for predicted in by_lhs[symbol]:
+                        add(position, (predicted, 0, position))
+                    if symbol in nullable:
+                        add(position, (rule, dot + 1, origin))
+                elif symbol == symbol_here:
+                    add(position + 1, (rule, dot + 1, origin))
+
+            if position < n and not charts[position + 1]:
+                return False  # Nothing scanned the next symbol, no later chart can be reached
+
+        return (0, 1, 0) in seen[n]
+
+
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import time
+
+    from lab5 import Grammar, convert_to_cnf_variant_1
+
+    def cnf_of(grammar):
+        with contextlib.redirect_stdout(io.StringIO()):  # The converter narrates every step
+            return convert_to_cnf_variant_1(grammar)
+
+    variant = Grammar.from_variant_1()
+    cyk, earley = CYKRecognizer(cnf_of(variant)), EarleyRecognizer(variant)
+    for word in ["ab", "aab", "abab", "ba", "bba"]:
+        print(f"{word}: CYK {cyk.accepts(word)}, Earley {earley.accepts(word)}")
+
+    def timed(recognizer, word):
+        start = time.perf_counter()
+        result = recognizer.accepts(word)
+        return result, time.perf_counter() - start
+
+    # Variant 1 is highly ambiguous, which is Earley's cubic worst case, so it stops at 500.
+    # Balanced brackets (a = open, b = close) are unambiguous and run the full range on both.
+    brackets = Grammar.parse_grammar("S -> aSbS\nS -> ε")
+    cases = [
+        ("variant 1", variant, lambda n: "ab" * (n // 2), 500),
+        ("brackets", brackets, lambda n: "a" * (n // 4) + "b" * (n // 4) + "ab" * (n // 4), 2000),
+    ]
+    for name, grammar, make_word, earley_limit in cases:
+        cyk, earley = CYKRecognizer(cnf_of(grammar)), EarleyRecognizer(grammar)
+        print(f"\nBenchmark on {name}:")
+        for length in (100, 250, 500, 1000, 2000):
+            word = make_word(length)
+            cyk_result, cyk_time = timed(cyk, word)
+            line = f"  n={length:5} accepted={cyk_result!s:5}  CYK {cyk_time:7.3f}s"
+            if length <= earley_limit:
+                earley_result, earley_time = timed(earley, word)
+                assert earley_result == cyk_result
+                line += f"  Earley {earley_time:7.3f}s"
+            print(line)
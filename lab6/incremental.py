@@ -0,0 +1,122 @@
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+from lexer import EOF, Lexer, Token, TokenStream
+from parser import Parser
+
+
+class IncrementalParser:
+    """Keeps a parsed score up to date under text edits, re-parsing only the damaged chunks
+
+    Top-level chunk boundaries (just after a chunk's closing brace) are points where both
+    the lexer and the parser are in their initial state. An edit re-lexes from the last
+    boundary before it and parses chunks until one ends on an old boundary shifted by the
+    edit, then the old chunk trees after that boundary are reused as they are.
+    """
+
+    def __init__(self, text, lexer=None, window=1024):
+        self.lexer = lexer if lexer is not None else Lexer()
+        self.window = window  # Characters handed to the lexer at a time
+        self.text = text
+        self.chunks = None  # One tree per chunk, as Parser.parse_chunk builds them
+        self.ends = None  # Offset just after each chunk's closing brace
+        self.reparsed = 0  # Chunks parsed by the last update, reused ones not included
+        self.reparse(0, 0)
+
+    def parse(self):
+        return self.chunks
+
+    def edit(self, offset, removed, inserted):
+        """Replace text[offset:offset + removed] with inserted and return the updated chunks"""
+        if not 0 <= offset <= offset + removed <= len(self.text):
+            raise ValueError(f"Edit ({offset}, {removed}) is outside the text of length {len(self.text)}")
+        self.text = self.text[:offset] + inserted + self.text[offset + removed:]
+
+        if self.chunks is None:
+            self.reparse(0, 0)  # The last version didn't parse, so there is nothing to reuse
+        else:
+            self.reparse(offset, removed, len(inserted))
+        return self.chunks
+
+    def reparse(self, offset, removed, inserted=None):
+        if inserted is None:  # Full parse
+            kept, old_ends, delta, edit_end = 0, [], 0, 0
+        else:
+            # Chunks ending at or before the edit are untouched, a closing brace can't merge
+            # with whatever gets typed after it
+            kept = bisect_right(self.ends, offset)
+            old_ends = self.ends
+            delta = inserted - removed
+            edit_end = offset + inserted  # End of the edit in the new text
+
+        chunks, ends = (self.chunks[:kept], self.ends[:kept]) if kept else ([], [])
+        start = ends[-1] if ends else 0
+
+        recent = deque(maxlen=2)  # The parser reads one token ahead, so the brace is recent[0]
+        tokens = self.tokens_from(start)
+        parser = Parser(TokenStream(recent.append(token) or token for token in tokens))
+        self.reparsed = 0
+
+        try:
+            while parser.current_token.kind != EOF:
+                chunks.append(parser.parse_chunk())
+                end = recent[0].end
+                ends.append(end)
+                self.reparsed += 1
+
+                # Back on an old boundary past the edit: everything after it is unchanged
+                if end >= edit_end and old_ends:
+                    i = bisect_left(old_ends, end - delta)
+                    if i < len(old_ends) and old_ends[i] == end - delta:
+                        chunks.extend(self.chunks[i + 1:])
+                        ends.extend(old_end + delta for old_end in old_ends[i + 1:])
+                        break
+        except SyntaxError:
+            self.chunks = self.ends = None
+            raise
+
+        self.chunks, self.ends = chunks, ends
+
+    def tokens_from(self, start):
+        """Lex the text from a chunk boundary on, a window at a time so only what's parsed is lexed"""
+        text, window = self.text, self.window
+        line = text.count("\n", 0, start) + 1
+        position = [start, line, text.rfind("\n", 0, start) + 1]
+
+        # Tokens never span a newline, so windows are cut just after one
+        while position[0] < len(text):
+            begin = position[0]
+            cut = text.rfind("\n", begin, begin + window) + 1
+            if not cut or begin + window >= len(text):
+                cut = text.find("\n", begin + window) + 1 or len(text)
+            yield from self.lexer.scan(text[begin:cut], position)
+
+        offset, line, line_start = position
+        yield Token(EOF, offset, offset, line, offset - line_start + 1, "", offset)
+
+
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import time
+
+    with open("test.test", "r") as f:
+        chunk = f.read()
+    code = "\n".join(chunk.replace("chunk1", f"chunk{i}") for i in range(1, 2001))
+
+    def full_parse(text):
+        with contextlib.redirect_stdout(io.StringIO()):  # Parser.parse narrates every chunk
+            return Parser(Lexer(text)).parse()
+
+    start = time.perf_counter()
+    expected = full_parse(code)
+    print(f"Full parse of {code.count(chr(10)) + 1} lines: {time.perf_counter() - start:.3f}s")
+
+    incremental = IncrementalParser(code)
+    target = code.index("Piano(R, do, 2/4)", len(code) // 2) + len("Piano(R, ")
+    start = time.perf_counter()
+    for note in ("re", "mi", "fa", "do"):
+        incremental.edit(target, 2, note)  # Retype one note in the middle of the score
+    elapsed = (time.perf_counter() - start) / 4
+    print(f"Incremental edit: {elapsed * 1000:.2f}ms, {incremental.reparsed} chunk(s) re-parsed")
+    assert incremental.parse() == expected
@@ -1,10 +1,17 @@
+import math
+from functools import lru_cache
+
+import numpy as np
 from pydub import AudioSegment
-from pydub.generators import Sine
+
+from nodes import Instrument, Loop, Pause, Setting, Sync
 
 # Constants
 SAMPLE_RATE = 44100  # Sample rate (samples per second)
-AMPLITUDE = 16000  # Amplitude of the sine wave (max for 16-bit PCM audio)
+SAMPLE_WIDTH = 2  # Bytes per sample, audio is rendered as 16-bit mono PCM
+AMPLITUDE = 32767  # Peak of the sine wave, full scale for 16-bit PCM like pydub's Sine generator
 DURATION = 1.0  # Duration of each note in seconds
+WAVEFORM_CACHE_SIZE = 256  # Distinct (frequency, length, rate, instrument) notes kept in memory
 
 # Mapping note names to frequencies (in Hz)
 NOTE_FREQUENCIES = {
@@ -12,87 +19,125 @@ NOTE_FREQUENCIES = {
     'la': 440.00, 'si': 493.88
 }
 
-# Generate sine wave for a given frequency using pydub's Sine generator
+# Scores repeat the same few notes, so each waveform is synthesized once and then only copied
+@lru_cache(maxsize=WAVEFORM_CACHE_SIZE)
+def sine_samples(frequency, n_samples, sample_rate=SAMPLE_RATE, instrument="PIANO"):
+    """n_samples of a sine wave as read-only int16 PCM, the instrument is part of the key for its timbre"""
+    step = (frequency * 2 * math.pi) / sample_rate
+    wave = (np.sin(np.arange(n_samples) * step) * AMPLITUDE).astype(np.int16)
+    wave.flags.writeable = False  # Shared by every note that hits the cache
+    return wave
+
+# Generate sine wave for a given frequency as an AudioSegment
 def generate_sine_wave(frequency, duration=DURATION, sample_rate=SAMPLE_RATE):
-    sine = Sine(frequency)
-    return sine.to_audio_segment(duration=duration * 1000)  # Duration in milliseconds
+    wave = sine_samples(frequency, int(duration * sample_rate), sample_rate)
+    return AudioSegment(data=wave.tobytes(), sample_width=SAMPLE_WIDTH, frame_rate=sample_rate, channels=1)
+
+def loop_iterations(loop):
+    """How many times a loop runs its body, stepping from its start note towards its stop note"""
+    loop_increment = int(loop.step)
+
+    loop_start_frequency = NOTE_FREQUENCIES.get(loop.start)
+    loop_condition_frequency = NOTE_FREQUENCIES.get(loop.stop)
+
+    if loop_start_frequency is None or loop_condition_frequency is None:
+        raise ValueError(f"Invalid note in loop: {loop.start} or {loop.stop}")
+
+    current_frequency = loop_start_frequency
+    iterations = 0
+
+    while current_frequency <= loop_condition_frequency:
+        iterations += 1
+        current_frequency += loop_increment * (loop_condition_frequency - loop_start_frequency) / 7
+    return iterations
 
 # Class to handle the music interpretation
 class MusicInterpreter:
-    def __init__(self, parsed_data):
+    def __init__(self, parsed_data, tempo=120, volume=80):
         self.parsed_data = parsed_data
-        self.tempo = 120  # Default tempo (beats per minute)
-        self.volume = 80  # Volume (0 to 127)
-        self.final_audio = AudioSegment.silent(duration=0)  # Start with an empty audio segment
-    
+        self.initial = (tempo, volume)
+        self.tempo = tempo  # Beats per minute, 120 unless a previous chunk changed it
+        self.volume = volume  # Volume (0 to 127)
+        self.samples = np.zeros(0, dtype=np.int16)  # The whole rendered timeline
+        self.cursor = 0  # Index of the next sample in the timeline
+        self.measuring = False  # True while only the length of the timeline is being computed
+        # Statements are dispatched on their node class, one dict lookup each
+        self.handlers = {
+            Setting: self.handle_setting,
+            Instrument: self.handle_instrument,
+            Pause: self.handle_pause,
+            Sync: self.handle_sync,
+            Loop: self.handle_loop,
+        }
+
     def fraction_to_duration(self, fraction, tempo):
         beat_duration_in_ms = (60 / tempo) * 1000
-        return beat_duration_in_ms * eval(fraction)
+        return beat_duration_in_ms * float(fraction)
+
+    def duration_to_samples(self, fraction):
+        # Same float steps as the pydub version: seconds back to milliseconds, then
+        # int(rate * ms / 1000), so every note keeps exactly the same length
+        milliseconds = self.fraction_to_duration(fraction, self.tempo) / 1000 * 1000
+        return int(SAMPLE_RATE * (milliseconds / 1000.0))
+
+    @property
+    def final_audio(self):
+        # Only wrapped into an AudioSegment when asked for, e.g. to export it
+        return AudioSegment(data=self.samples.tobytes(), sample_width=SAMPLE_WIDTH, frame_rate=SAMPLE_RATE, channels=1)
 
     def generate_music(self):
+        # The first pass only measures the timeline, so the second can write every note
+        # straight into its slice of one preallocated buffer instead of concatenating audio
+        self.run(measure=True)
+        self.samples = np.zeros(self.cursor, dtype=np.int16)
+        self.run(measure=False)
+
+    def run(self, measure):
+        self.tempo, self.volume = self.initial
+        self.cursor, self.measuring = 0, measure
         for chunk in self.parsed_data:
-            for statement in chunk['statements']:
-                if statement['type'] == 'TIME_SIGNATURE':
-                    pass  # Handle time signature if needed
-                elif statement['type'] == 'TEMPO':
-                    self.tempo = int(statement['value'].split('=')[1])
-                elif statement['type'] == 'VOLUME':
-                    self.volume = int(statement['value'].split('=')[1])
-                elif statement['type'] == 'PIANO':
-                    self.handle_piano(statement)
-                elif statement['type'] == 'GUITAR':
-                    self.handle_guitar(statement)
-                elif statement['type'] == 'SYNC':
-                    self.handle_sync(statement['statements'])
-                elif statement['type'] == 'LOOP':
-                    self.handle_loop(statement)
-
-    def handle_piano(self, statement):
-        note_name = statement['identifier2']
-        fraction = statement['fraction']
-        frequency = NOTE_FREQUENCIES.get(note_name)
-        if frequency:
-            duration_ms = self.fraction_to_duration(fraction, self.tempo)
-            sine_wave_segment = generate_sine_wave(frequency, duration=duration_ms / 1000)
-            self.final_audio += sine_wave_segment
-
-    def handle_guitar(self, statement):
-        note_name = statement['identifier2']
-        fraction = statement['fraction']
-        frequency = NOTE_FREQUENCIES.get(note_name)
+            self.execute(chunk.statements)
+
+    def execute(self, statements):
+        handlers = self.handlers
+        for statement in statements:
+            handlers[type(statement)](statement)
+
+    def handle_setting(self, setting):
+        if setting.kind == 'TEMPO':
+            self.tempo = setting.value
+        elif setting.kind == 'VOLUME':
+            self.volume = setting.value
+        # Time signature doesn't affect the audio yet
+
+    def handle_instrument(self, statement):
+        frequency = NOTE_FREQUENCIES.get(statement.note)
         if frequency:
-            duration_ms = self.fraction_to_duration(fraction, self.tempo)
-            sine_wave_segment = generate_sine_wave(frequency, duration=duration_ms / 1000)
-            self.final_audio += sine_wave_segment
-
-    def handle_sync(self, sync_statements):
-        for statement in sync_statements:
-            if statement['type'] == 'PIANO':
-                self.handle_piano(statement)
-            elif statement['type'] == 'GUITAR':
-                self.handle_guitar(statement)
-
-    def handle_loop(self, loop_data):
-        loop_start_value = loop_data['start_value']
-        loop_condition = loop_data['condition_value']
-        loop_increment = int(loop_data['increment_value'])
-        loop_body = loop_data['body']
-        
-        loop_start_frequency = NOTE_FREQUENCIES.get(loop_start_value)
-        loop_condition_frequency = NOTE_FREQUENCIES.get(loop_condition)
-        
-        if loop_start_frequency is None or loop_condition_frequency is None:
-            raise ValueError(f"Invalid note in loop: {loop_start_value} or {loop_condition}")
-
-        current_frequency = loop_start_frequency
-
-        while current_frequency <= loop_condition_frequency:
-            for action in loop_body:
-                if action['type'] == 'PIANO':
-                    self.handle_piano(action)
-                elif action['type'] == 'GUITAR':
-                    self.handle_guitar(action)
-            current_frequency += loop_increment * (loop_condition_frequency - loop_start_frequency) / 7
+            n_samples = self.duration_to_samples(statement.duration)
+            if not self.measuring:
+                wave = sine_samples(frequency, n_samples, SAMPLE_RATE, statement.instrument)
+                self.samples[self.cursor:self.cursor + n_samples] = wave
+            self.cursor += n_samples
+
+    def handle_pause(self, pause):
+        pass  # Pauses are parsed but not rendered yet
+
+    def handle_sync(self, sync):
+        self.play_instruments(sync.statements)
+
+    def handle_loop(self, loop):
+        for _ in range(loop_iterations(loop)):
+            self.play_instruments(loop.body)
+
+    def play_instruments(self, statements):
+        # Sync blocks and loop bodies only play instrument calls, anything else inside is ignored
+        for statement in statements:
+            if type(statement) is Instrument:
+                self.handle_instrument(statement)
+
+    def waveform_cache_info(self):
+        # Hits are notes that were only copied, misses the ones that had to be synthesized
+        return sine_samples.cache_info()
 
     def save_to_mp3(self, filename="output.mp3"):
         self.final_audio.export(filename, format="mp3")  # Export final composition to MP3
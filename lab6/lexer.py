@@ -1,4 +1,6 @@
 import re
+from collections import deque
+from functools import lru_cache
 
 TOKEN_TYPES = [
     ("CHUNK", r'chunk\d+'),
@@ -26,29 +28,192 @@ TOKEN_TYPES = [
 ]
 
 TOKEN_REGEX = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in TOKEN_TYPES)
+SEPARATORS = " \t\n"  # Characters no token other than WHITESPACE can contain
+
+
+@lru_cache(maxsize=None)
+def compile_token_spec(token_types):
+    """Compile a token spec (tuple of (name, pattern) pairs) once, however many lexers use it"""
+    return re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in token_types))
+
+
+# Token kinds are small ints interned by name, shared by every token spec
+TOKEN_NAMES = []
+TOKEN_KINDS = {}
+
+
+def token_kind(name):
+    kind = TOKEN_KINDS.get(name)
+    if kind is None:
+        kind = TOKEN_KINDS[name] = len(TOKEN_NAMES)
+        TOKEN_NAMES.append(name)
+    return kind
+
+
+EOF = token_kind("EOF")
+WHITESPACE = token_kind("WHITESPACE")
+
+
+class Token:
+    """A token as a kind plus a span of the source, the text is only sliced out when asked for"""
+
+    __slots__ = ("kind", "start", "end", "line", "column", "source", "offset")
+
+    def __init__(self, kind, start, end, line, column, source, offset=0):
+        self.kind = kind
+        self.start = start  # Absolute character offsets in the whole input
+        self.end = end
+        self.line = line  # 1-based
+        self.column = column  # 1-based
+        self.source = source  # Buffer the token was scanned from, beginning at `offset`
+        self.offset = offset
+
+    @property
+    def type(self):
+        return TOKEN_NAMES[self.kind]
+
+    @property
+    def value(self):
+        if self.kind == EOF:
+            return None
+        return self.source[self.start - self.offset:self.end - self.offset]
+
+    # Tuple-style access, so token[0] / token[1] keep working as type / value
+    def __getitem__(self, index):
+        return (self.type, self.value)[index]
+
+    def __iter__(self):
+        return iter((self.type, self.value))
+
+    def __repr__(self):
+        return f"Token({self.type}, {self.value!r}, {self.line}:{self.column})"
+
+
+class TokenStream:
+    """Pulls tokens from an iterator on demand, with a small lookahead buffer for peek()"""
+
+    def __init__(self, tokens):
+        self.tokens = iter(tokens)
+        self.lookahead = deque()
+        self.eof = Token(EOF, 0, 0, 1, 1, "")  # Replaced by the real EOF token once it is seen
+
+    def pull(self):
+        token = next(self.tokens, None)
+        if token is None:
+            return self.eof
+        if token.kind == EOF:
+            self.eof = token
+        return token
+
+    def next_token(self):
+        if self.lookahead:
+            return self.lookahead.popleft()
+        return self.pull()
+
+    def peek(self, k=1):
+        # k-th upcoming token without consuming it, EOF once the input is exhausted
+        while len(self.lookahead) < k:
+            self.lookahead.append(self.pull())
+        return self.lookahead[k - 1]
+
+    def __iter__(self):
+        while True:
+            token = self.next_token()
+            yield token
+            if token.kind == EOF:
+                return
 
 
 class Lexer:
-    def __init__(self, text):
-        self.text = text
-        self.tokens = self.tokenize()
+    def __init__(self, source=None, token_types=TOKEN_TYPES, chunk_size=1 << 16):
+        token_types = tuple(map(tuple, token_types))
+        self.pattern = compile_token_spec(token_types)
+        self.kinds = {name: token_kind(name) for name, _ in token_types}
+        self.chunk_size = chunk_size
+        self.stream = TokenStream(())
+        if source is not None:
+            self.reset(source)
+
+    def reset(self, source, position=None):
+        # Reuse this lexer (and its compiled pattern) for another text or file object
+        self.stream = TokenStream(self.iter_tokens(source, position))
 
-    def tokenize(self):
-        tokens = []
-        for match in re.finditer(TOKEN_REGEX, self.text):
-            token_type = match.lastgroup
-            value = match.group()
+    def iter_tokens(self, source, position=None):
+        """Lazily yield the tokens of a string or a text file object, ending with EOF
 
-            if token_type == "WHITESPACE":  # Ignore spaces and newlines
-                continue
+        position is (offset, line, line start offset) of where source begins, for a piece cut
+        out of a larger document, so that token positions refer to the whole document.
+        """
+        # Offset of the next buffer, current line, offset where that line starts
+        position = list(position) if position is not None else [0, 1, 0]
 
-            tokens.append((token_type, value))
-        
-        tokens.append(("EOF", None))  # Add end of file token
-        return tokens
+        if isinstance(source, str):
+            yield from self.scan(source, position)
+        else:
+            # scan() only consumes the part of a buffer that no later input can change and
+            # returns where it stopped, the rest is scanned again with the next chunk. That only
+            # happens once at least as much new text has arrived, which keeps rescans linear
+            pending = ""
+            parts, fresh = [], 0
+            while True:
+                chunk = source.read(self.chunk_size)
+                if not chunk:
+                    break
+                parts.append(chunk)
+                fresh += len(chunk)
+                if fresh < len(pending):
+                    continue
+                text = pending + "".join(parts)
+                parts, fresh = [], 0
+                resume = yield from self.scan(text, position, final=False)
+                pending = text[resume:]
+            yield from self.scan(pending + "".join(parts), position)
+
+        offset, line, line_start = position
+        yield Token(EOF, offset, offset, line, offset - line_start + 1, "", offset)  # Add end of file token
+
+    def scan(self, text, position, final=True):
+        # Lines are counted between consecutive matches, so positions cost no extra pass.
+        # Unless final, only the part of text that more input can't change is scanned, and
+        # its length is returned
+        if not final:
+            # Only whitespace contains separators in the default spec, so everything up to the
+            # last one can't change. A custom spec gives no such guarantee
+            if self.pattern.pattern != TOKEN_REGEX:
+                raise ValueError("Custom token specs can't be lexed from a file in chunks, read the file into a string or use a Scanner")
+            text = text[:max(text.rfind(separator) for separator in SEPARATORS) + 1]
+
+        offset, line, line_start = position
+        kinds = self.kinds
+        last = 0
+
+        for match in self.pattern.finditer(text):
+            start, end = match.span()
+            newlines = text.count("\n", last, start)
+            if newlines:
+                line += newlines
+                line_start = offset + text.rindex("\n", last, start) + 1
+            last = start
+
+            kind = kinds[match.lastgroup]
+            if kind != WHITESPACE:  # Ignore spaces and newlines
+                yield Token(kind, offset + start, offset + end, line, offset + start - line_start + 1, text, offset)
+
+        newlines = text.count("\n", last)
+        if newlines:
+            line += newlines
+            line_start = offset + text.rindex("\n", last) + 1
+        position[:] = [offset + len(text), line, line_start]
+        return len(text)
+
+    def tokenize(self, text):
+        return list(self.iter_tokens(text))
 
     def next_token(self):
-        return self.tokens.pop(0) if self.tokens else ("EOF", None)
+        return self.stream.next_token()
+
+    def peek(self, k=1):
+        return self.stream.peek(k)
 
 
 # Example usage:
@@ -71,5 +236,5 @@ if __name__ == "__main__":
     }
     """
     lexer = Lexer(code)
-    for token in lexer.tokens:
+    for token in lexer.stream:
         print(token)
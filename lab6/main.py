@@ -1,28 +1,40 @@
+import argparse
+import os
+
 from lexer import Lexer
 from parser import Parser
 from interpreter import MusicInterpreter
+from parallel import render_parallel
 
 # Main function to parse and interpret code
 if __name__ == "__main__":
-    # Path to the test file
-    file_path = '/home/dima/Documents/LFA/lab6/test.test'
-    
+    arguments = argparse.ArgumentParser(description="Render a score to output_music.mp3")
+    arguments.add_argument("file_path", nargs="?", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.test"))
+    arguments.add_argument("--workers", type=int, default=0,
+                           help="Parse and render chunks in this many processes (0 renders in this one)")
+    args = arguments.parse_args()
+
     # Step 1: Read the content of the file
-    with open(file_path, 'r') as file:
+    with open(args.file_path, 'r') as file:
         code = file.read()
 
-    # Step 2: Tokenize the code using the lexer
-    lexer = Lexer(code)
-    
-    # Step 3: Parse the tokens using the parser
-    parser = Parser(lexer)
-    parsed_data = parser.parse()
-    
-    # Step 4: Interpret the parsed data and generate audio
-    interpreter = MusicInterpreter(parsed_data)
-    interpreter.generate_music()
-    
+    if args.workers:
+        # Steps 2-4 chunk by chunk in a process pool, stitched back together in order
+        final_audio = render_parallel(code, args.workers)
+    else:
+        # Step 2: Tokenize the code using the lexer
+        lexer = Lexer(code)
+
+        # Step 3: Parse the tokens using the parser
+        parser = Parser(lexer)
+        parsed_data = parser.parse()
+
+        # Step 4: Interpret the parsed data and generate audio
+        interpreter = MusicInterpreter(parsed_data)
+        interpreter.generate_music()
+        final_audio = interpreter.final_audio
+
     # Optional: Export or play the audio
     # For example: Save the generated audio to a file
-    interpreter.final_audio.export("output_music.mp3", format="mp3")
+    final_audio.export("output_music.mp3", format="mp3")
     print("Music generated and saved to output_music.mp3")
@@ -0,0 +1,77 @@
+from fractions import Fraction
+
+
+class Node:
+    """Base for the parse tree nodes, slotted so large scores stay small in memory"""
+
+    __slots__ = ()
+
+    def fields(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.fields() == other.fields()
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+
+class Chunk(Node):
+    __slots__ = ("name", "statements")
+
+    def __init__(self, name, statements):
+        self.name = name  # e.g. "chunk1"
+        self.statements = statements
+
+
+class Setting(Node):
+    __slots__ = ("kind", "value")
+
+    def __init__(self, kind, value):
+        self.kind = kind  # "TIME_SIGNATURE", "TEMPO" or "VOLUME"
+        self.value = value  # (beats, unit) for a time signature, an int otherwise
+
+    @classmethod
+    def from_text(cls, kind, text):
+        # "Tempo=120" -> 120, "TimeSignature=3/4" -> (3, 4)
+        value = text.split("=", 1)[1]
+        if kind == "TIME_SIGNATURE":
+            beats, unit = value.split("/")
+            return cls(kind, (int(beats), int(unit)))
+        return cls(kind, int(value))
+
+
+class Instrument(Node):
+    __slots__ = ("instrument", "channel", "note", "duration")
+
+    def __init__(self, instrument, channel, note, duration):
+        self.instrument = instrument  # "PIANO" or "GUITAR"
+        self.channel = channel  # L or R
+        self.note = note  # do, re, mi... or a loop variable
+        self.duration = Fraction(duration)  # In beats
+
+
+class Pause(Node):
+    __slots__ = ("duration",)
+
+    def __init__(self, duration):
+        self.duration = Fraction(duration)
+
+
+class Sync(Node):
+    __slots__ = ("statements",)
+
+    def __init__(self, statements):
+        self.statements = statements
+
+
+class Loop(Node):
+    __slots__ = ("variable", "start", "stop", "step", "body")
+
+    def __init__(self, variable, start, stop, step, body):
+        self.variable = variable
+        self.start = start  # Note the variable starts at
+        self.stop = stop  # Note it is compared against
+        self.step = step  # int, or an identifier when the source used one
+        self.body = body
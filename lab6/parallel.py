@@ -0,0 +1,93 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from pydub import AudioSegment
+
+from interpreter import SAMPLE_RATE, SAMPLE_WIDTH, MusicInterpreter
+from lexer import EOF, Lexer, token_kind
+from nodes import Setting
+from parser import Parser
+
+LBRACE, RBRACE = token_kind("LBRACE"), token_kind("RBRACE")
+
+
+def split_chunks(source, lexer=None):
+    """Cut the source after every top-level closing brace, returning (text, position) pieces
+
+    position is where the piece starts in the source, as Lexer.reset expects it. The pieces
+    cover the whole source, so anything outside a chunk still reaches a parser and fails there.
+    """
+    lexer = lexer if lexer is not None else Lexer()
+    pieces = []
+    start, depth = [0, 1, 0], 0
+
+    for token in lexer.iter_tokens(source):
+        if token.kind == LBRACE:
+            depth += 1
+        elif token.kind == RBRACE:
+            depth -= 1
+            if depth == 0:
+                pieces.append((source[start[0]:token.end], start))
+                start = [token.end, token.line, token.start - token.column + 1]
+        elif token.kind == EOF and pieces and not source[start[0]:].strip():
+            # Trailing whitespace after the last chunk belongs to no piece
+            break
+        elif token.kind == EOF:
+            pieces.append((source[start[0]:], start))
+
+    return pieces
+
+
+def parse_piece(piece):
+    """Parse a piece cut by split_chunks into a single Chunk node"""
+    text, position = piece
+    lexer = Lexer()
+    lexer.reset(text, position)
+    parser = Parser(lexer)
+    if parser.current_token.kind == EOF:
+        return None  # A piece with no chunk in it, e.g. an empty source
+    chunk = parser.parse_chunk()
+    if parser.current_token.kind != EOF:
+        raise parser.error(f"Unexpected token {parser.current_token}")
+    return chunk
+
+
+def settings_after(statements, tempo, volume):
+    """Tempo and volume once the statements have run, without rendering anything"""
+    # Only top-level settings count, the interpreter ignores them inside sync blocks and loops
+    for statement in statements:
+        if isinstance(statement, Setting):
+            if statement.kind == "TEMPO":
+                tempo = statement.value
+            elif statement.kind == "VOLUME":
+                volume = statement.value
+    return tempo, volume
+
+
+def render_chunk(job):
+    """Render one chunk from the tempo and volume the previous chunks left, as raw PCM bytes"""
+    chunk, tempo, volume = job
+    interpreter = MusicInterpreter([chunk], tempo, volume)
+    interpreter.generate_music()
+    return interpreter.samples.tobytes()
+
+
+def render_parallel(source, workers=None):
+    """Parse and render the chunks of a score in a process pool, stitched back in order"""
+    workers = workers or os.cpu_count()
+    pieces = split_chunks(source)
+    chunksize = max(1, len(pieces) // (workers * 4))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunks = [chunk for chunk in pool.map(parse_piece, pieces, chunksize=chunksize) if chunk is not None]
+
+        # The state a chunk starts from only depends on the settings before it, which is cheap
+        jobs = []
+        tempo, volume = 120, 80
+        for chunk in chunks:
+            jobs.append((chunk, tempo, volume))
+            tempo, volume = settings_after(chunk.statements, tempo, volume)
+
+        pcm = b"".join(pool.map(render_chunk, jobs, chunksize=chunksize))
+
+    return AudioSegment(data=pcm, sample_width=SAMPLE_WIDTH, frame_rate=SAMPLE_RATE, channels=1)
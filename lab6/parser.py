@@ -1,21 +1,30 @@
+from lexer import TOKEN_KINDS
+from nodes import Chunk, Instrument, Loop, Pause, Setting, Sync
+
+
 class Parser:
     def __init__(self, lexer):
         self.lexer = lexer
         self.current_token = self.lexer.next_token()
 
+    def error(self, message):
+        token = self.current_token
+        return SyntaxError(f"{message} at line {token.line}, column {token.column}")
+
     def eat(self, token_type):
-        if self.current_token and self.current_token[0] == token_type:
+        if self.current_token.kind == TOKEN_KINDS.get(token_type):
             self.current_token = self.lexer.next_token()
         else:
-            raise SyntaxError(f"Expected {token_type}, got {self.current_token}")
+            raise self.error(f"Expected {token_type}, got {self.current_token}")
 
     def parse_chunk(self):
         # Start a new chunk node in the tree
+        name = self.current_token[1]
         self.eat("CHUNK")
         self.eat("LBRACE")
         chunk_data = self.parse_statements()  # Get the statements inside this chunk
         self.eat("RBRACE")
-        return {"type": "CHUNK", "statements": chunk_data}
+        return Chunk(name, chunk_data)
 
     def parse_statements(self):
         statements = []
@@ -38,13 +47,13 @@ class Parser:
         elif self.current_token[0] == "SYNC":
             return self.parse_sync_block()
         else:
-            raise SyntaxError(f"Unexpected token {self.current_token}")
+            raise self.error(f"Unexpected token {self.current_token}")
 
     def parse_setting_statement(self):
         statement_type = self.current_token[0]
         value = self.current_token[1]
         self.eat(statement_type)  # Consume the setting token
-        return {"type": statement_type, "value": value}
+        return Setting.from_text(statement_type, value)
 
 
     def parse_pause(self):
@@ -53,7 +62,7 @@ class Parser:
         duration = self.current_token[1]  
         self.eat("FRACTION")
         self.eat("RPAREN")
-        return {"type": "PAUSE", "duration": duration}
+        return Pause(duration)
 
     def parse_instrument_call(self, instrument_type):
         self.eat(instrument_type)
@@ -68,12 +77,7 @@ class Parser:
         self.eat("FRACTION")
         self.eat("RPAREN")
         
-        return {
-            "type": instrument_type,
-            "identifier1": identifier1,
-            "identifier2": identifier2,
-            "fraction": fraction
-        }
+        return Instrument(instrument_type, identifier1, identifier2, fraction)
 
     def parse_loop(self):
         self.eat("LOOP")
@@ -107,11 +111,14 @@ class Parser:
         self.eat("PLUS_EQUALS")
         
         # Ensure the increment value is either an identifier or a number
-        if self.current_token[0] in {"IDENTIFIER", "NUMBER"}:
+        if self.current_token[0] == "NUMBER":
+            loop_data["increment_value"] = int(self.current_token[1])
+            self.eat("NUMBER")
+        elif self.current_token[0] == "IDENTIFIER":
             loop_data["increment_value"] = self.current_token[1]
-            self.eat(self.current_token[0])  # Consume the increment value
+            self.eat("IDENTIFIER")
         else:
-            raise SyntaxError(f"Expected IDENTIFIER or NUMBER for increment, got {self.current_token}")
+            raise self.error(f"Expected IDENTIFIER or NUMBER for increment, got {self.current_token}")
         
         self.eat("RPAREN")
         self.eat("LBRACE")
@@ -120,14 +127,15 @@ class Parser:
         loop_data["body"] = self.parse_statements()
         self.eat("RBRACE")
         
-        return {"type": "LOOP", **loop_data}
+        return Loop(loop_data["identifier"], loop_data["start_value"], loop_data["condition_value"],
+                    loop_data["increment_value"], loop_data["body"])
 
     def parse_sync_block(self):
         self.eat("SYNC")
         self.eat("LBRACE")
         sync_data = self.parse_statements()  # Sync block statements
         self.eat("RBRACE")
-        return {"type": "SYNC", "statements": sync_data}
+        return Sync(sync_data)
 
     def parse(self):
         print("Starting parsing...")
@@ -144,4 +152,4 @@ class Parser:
             print(f"Parsed structure:\n{parsed_chunks}") 
             return parsed_chunks  
 
-        raise SyntaxError(f"Unexpected token {self.current_token}")  # ❌ Error if anything extra
+        raise self.error(f"Unexpected token {self.current_token}")  # ❌ Error if anything extra
@@ -0,0 +1,267 @@
+import os
+import string
+import sys
+from functools import lru_cache
+
+from lexer import TOKEN_TYPES, WHITESPACE, Lexer, Token, token_kind
+
+# The lab folders aren't packages, so reach the lab2 automata through the path. Appended, so
+# modules of this lab (lexer, parser, main...) still win over any lab2 module of the same name
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab2"))
+from ndfa_to_nfa import NFA, NFAtoDFAConverter  # noqa: E402
+
+DIGITS = "0123456789"
+WORD = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ" + DIGITS + "_"
+ESCAPES = {"d": DIGITS, "w": WORD, "s": " \t\n\r\f\v", "t": "\t", "n": "\n", "r": "\r"}
+
+
+class RegexToNFA:
+    """Thompson construction for the regex subset used in TOKEN_TYPES
+
+    Supports literals, the escapes in ESCAPES plus escaped punctuation, [...] classes with
+    ranges, (...) groups, | and the quantifiers *, + and ?. Anything else raises ValueError. Each token's final state is recorded in `accepting`.
+    """
+
+    def __init__(self):
+        self.transitions = {}
+        self.alphabet = set()
+        self.accepting = {}  # NFA state -> index of the token it accepts
+        self.count = 0
+
+    def new_state(self):
+        self.count += 1
+        self.transitions[self.count] = {}
+        return self.count
+
+    def edge(self, source, symbol, target):
+        self.transitions[source].setdefault(symbol, set()).add(target)
+        if symbol != '':
+            self.alphabet.add(symbol)
+
+    def add_token(self, start, pattern, priority):
+        self.pattern, self.position = pattern, 0
+        begin, end = self.alternation()
+        if self.position != len(pattern):
+            raise ValueError(f"Unsupported regex {pattern!r} at position {self.position}")
+        self.edge(start, '', begin)
+        self.accepting[end] = priority
+
+    def peek(self):
+        return self.pattern[self.position] if self.position < len(self.pattern) else None
+
+    def take(self):
+        char = self.pattern[self.position]
+        self.position += 1
+        return char
+
+    def alternation(self):
+        begin, end = self.sequence()
+        while self.peek() == "|":
+            self.take()
+            other_begin, other_end = self.sequence()
+            start, finish = self.new_state(), self.new_state()
+            self.edge(start, '', begin)
+            self.edge(start, '', other_begin)
+            self.edge(end, '', finish)
+            self.edge(other_end, '', finish)
+            begin, end = start, finish
+        return begin, end
+
+    def sequence(self):
+        begin = end = self.new_state()
+        while self.peek() not in (None, "|", ")"):
+            atom_begin, atom_end = self.quantified()
+            self.edge(end, '', atom_begin)
+            end = atom_end
+        return begin, end
+
+    def quantified(self):
+        begin, end = self.atom()
+        while self.peek() in ("*", "+", "?"):
+            quantifier = self.take()
+            start, finish = self.new_state(), self.new_state()
+            self.edge(start, '', begin)
+            self.edge(end, '', finish)
+            if quantifier in ("*", "+"):
+                self.edge(end, '', begin)
+            if quantifier in ("*", "?"):
+                self.edge(start, '', finish)
+            begin, end = start, finish
+        return begin, end
+
+    def atom(self):
+        char = self.take()
+        if char == "(":
+            fragment = self.alternation()
+            if self.peek() != ")":
+                raise ValueError(f"Unbalanced group in {self.pattern!r}")
+            self.take()
+            return fragment
+        if char == "[":
+            chars = self.char_class()
+        elif char == "\\":
+            chars = self.escape()
+        elif char in ".^$*+?{}":  # Anchors, wildcard, {m,n} counts, or a quantifier with nothing to repeat
+            raise ValueError(f"Unsupported regex construct {char!r} in {self.pattern!r}")
+        else:
+            chars = char
+
+        begin, end = self.new_state(), self.new_state()
+        for symbol in chars:
+            self.edge(begin, symbol, end)
+        return begin, end
+
+    def escape(self):
+        char = self.peek()
+        if char is None:
+            raise ValueError(f"Trailing backslash in {self.pattern!r}")
+        self.take()
+        if char in ESCAPES:
+            return ESCAPES[char]
+        if char in string.punctuation:
+            return char
+        raise ValueError(f"Unsupported escape \\{char} in {self.pattern!r}")
+
+    def char_class(self):
+        if self.peek() == "^":
+            raise ValueError(f"Negated classes are not supported: {self.pattern!r}")
+        chars = set()
+        while self.peek() != "]":
+            if self.peek() is None:
+                raise ValueError(f"Unterminated class in {self.pattern!r}")
+            char = self.take()
+            if char == "\\":
+                chars.update(self.escape())
+            elif self.peek() == "-" and self.pattern[self.position + 1:self.position + 2] not in ("]", ""):
+                self.take()
+                last = self.take()
+                chars.update(chr(code) for code in range(ord(char), ord(last) + 1))
+            else:
+                chars.add(char)
+        self.take()
+        return "".join(sorted(chars))
+
+
+@lru_cache(maxsize=None)
+def build_scanner_tables(token_types):
+    """Determinize the union of all token NFAs into a dense, character-class indexed table"""
+    builder = RegexToNFA()
+    start = builder.new_state()
+    for priority, (_, pattern) in enumerate(token_types):
+        builder.add_token(start, pattern, priority)
+
+    nfa = NFA(set(builder.transitions), builder.alphabet, builder.transitions, start, set(builder.accepting))
+    converter = NFAtoDFAConverter(nfa)
+
+    # DFA state 0 is dead, the converter's states follow in discovery order
+    ids = {key: i + 1 for i, key in enumerate(converter.keys)}
+    states = len(ids) + 1
+
+    # Longest match is decided while scanning, ties between tokens go to the earlier one
+    accepts = [None] * states
+    conflicts = set()
+    for key, members in zip(converter.keys, converter.states):
+        tokens = sorted(builder.accepting[state] for state in members if state in builder.accepting)
+        if tokens:
+            accepts[ids[key]] = tokens[0]
+            conflicts.update((tokens[0], loser) for loser in tokens[1:])
+
+    # Characters with identical columns share one class, which keeps the table small
+    columns = {}
+    for char in sorted(builder.alphabet):
+        column = tuple(
+            ids.get(converter.transitions.get(key, {}).get(char, [None])[0], 0)
+            for key in converter.keys
+        )
+        columns.setdefault(column, []).append(char)
+
+    classes = {}
+    table = [0] * (states * len(columns))
+    for class_id, (column, chars) in enumerate(columns.items()):
+        for char in chars:
+            classes[char] = class_id
+        for source, target in enumerate(column, start=1):
+            table[source * len(columns) + class_id] = target
+
+    names = [name for name, _ in token_types]
+    conflicts = sorted((names[winner], names[loser]) for winner, loser in conflicts)
+    return classes, len(columns), table, ids[converter.initial_state], accepts, conflicts
+
+
+class Scanner(Lexer):
+    """Drop-in Lexer that scans with a table-driven DFA using longest match, then priority"""
+
+    def __init__(self, source=None, token_types=TOKEN_TYPES, chunk_size=1 << 16):
+        token_types = tuple(map(tuple, token_types))
+        tables = build_scanner_tables(token_types)
+        self.classes, self.width, self.table, self.start, accepts, self.conflicts = tables
+        # One row per state plus a sentinel class for characters no token uses, so the hot
+        # loop is two list indexes per character over a str.translate'd copy of the text
+        self.rows = [self.table[state * self.width:(state + 1) * self.width] + [0]
+                     for state in range(len(self.table) // self.width)]
+        self.translation = [self.width] * 0x80
+        for char, char_class in self.classes.items():
+            if ord(char) < 0x80:
+                self.translation[ord(char)] = char_class
+        self.token_kinds = [token_kind(name) for name, _ in token_types]
+        self.accepts = [None if token is None else self.token_kinds[token] for token in accepts]
+        super().__init__(source, token_types, chunk_size)
+
+    def scan(self, text, position, final=True):
+        # Unless final, a token still being matched when the text runs out is held back, and
+        # the offset to resume scanning from is returned
+        offset, line, line_start = position
+        rows, accepts, start, sentinel = self.rows, self.accepts, self.start, self.width
+        classes, translation = self.classes, self.translation
+        codes = [translation[code] if code < 0x80 else classes.get(chr(code), sentinel) for code in map(ord, text)]
+        length = len(text)
+        i = 0
+
+        while i < length:
+            state, j = start, i
+            best_kind, best_end = None, i
+            while j < length:
+                state = rows[state][codes[j]]
+                if not state:
+                    break
+                j += 1
+                if accepts[state] is not None:
+                    best_kind, best_end = accepts[state], j
+
+            if j == length and state and not final:
+                break
+
+            if best_kind is None:
+                i += 1  # No token starts here, skip the character like re.finditer does
+                continue
+
+            if best_kind != WHITESPACE:
+                yield Token(best_kind, offset + i, offset + best_end, line, offset + i - line_start + 1, text, offset)
+
+            newlines = text.count("\n", i, best_end)
+            if newlines:
+                line += newlines
+                line_start = offset + text.rindex("\n", i, best_end) + 1
+            i = best_end
+
+        position[:] = [offset + i, line, line_start]
+        return i
+
+
+if __name__ == "__main__":
+    import time
+
+    sample = "for(note = do; note < sol; note+=1){ format Pianos chunk1x }"
+    regex_tokens = [(token.type, token.value) for token in Lexer().tokenize(sample)]
+    dfa_tokens = [(token.type, token.value) for token in Scanner().tokenize(sample)]
+    print("re alternation:", regex_tokens)
+    print("DFA scanner:   ", dfa_tokens)
+    print("Ties resolved by TOKEN_TYPES order:", Scanner().conflicts)
+
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.test")) as f:
+        code = f.read() * 2000
+
+    for name, lexer in (("re Lexer", Lexer()), ("DFA Scanner", Scanner())):
+        begin = time.perf_counter()
+        tokens = lexer.tokenize(code)
+        print(f"{name}: {len(tokens)} tokens in {time.perf_counter() - begin:.3f}s")